@@ -0,0 +1,65 @@
+"""performance indexes
+
+Revision ID: 3f1b2c7d9e4a
+Revises: 5c052e8a9e6d
+Create Date: 2026-10-17 10:12:40.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1b2c7d9e4a'
+down_revision: Union[str, None] = '5c052e8a9e6d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# CREATE INDEX CONCURRENTLY cannot run inside a transaction block, so every
+# statement is issued in autocommit mode. if_not_exists makes a retry after an
+# interrupted run safe (drop any INVALID leftovers first).
+INDEXES = [
+    (
+        'ix_transactions_user_id_done_at',
+        'transactions',
+        ['user_id', sa.text('done_at DESC'), 'id'],
+        {'postgresql_where': sa.text('NOT is_deleted')},
+    ),
+    ('ix_transactions_user_id_updated_at', 'transactions', ['user_id', 'updated_at', 'id'], {}),
+    ('ix_transactions_category_id', 'transactions', ['category_id'], {}),
+    ('ix_transactions_from_account_id', 'transactions', ['from_account_id'], {}),
+    ('ix_transactions_to_account_id', 'transactions', ['to_account_id'], {}),
+    ('ix_accounts_user_id', 'accounts', ['user_id'], {}),
+    ('ix_categories_user_id', 'categories', ['user_id'], {}),
+    ('ix_goals_user_id', 'goals', ['user_id'], {}),
+    ('ix_goals_account_id', 'goals', ['account_id'], {}),
+    ('ix_reminders_user_id', 'reminders', ['user_id'], {}),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+                **kwargs,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
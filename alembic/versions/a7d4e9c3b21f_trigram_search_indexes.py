@@ -0,0 +1,52 @@
+"""trigram search indexes
+
+Revision ID: a7d4e9c3b21f
+Revises: 3f1b2c7d9e4a
+Create Date: 2026-10-17 11:40:02.527913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d4e9c3b21f'
+down_revision: Union[str, None] = '3f1b2c7d9e4a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ('ix_transactions_title_trgm', 'transactions', 'title'),
+    ('ix_accounts_name_trgm', 'accounts', 'name'),
+    ('ix_categories_name_trgm', 'categories', 'name'),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for name, table, column in INDEXES:
+            op.create_index(
+                name,
+                table,
+                [column],
+                unique=False,
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -1,3 +1,4 @@
+from typing import List, Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -14,5 +15,68 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     REFRESH_TOKEN_EXPIRE_DAYS: int
 
+    # Database connection pools, per engine and per worker process (see
+    # database.py); a recycle of -1 or a statement timeout of 0 disables it
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_QUERY_CACHE_SIZE: int = 500
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+
+    # Read replicas for GET routes, as Postgres URLs in JSON (see replicas.py)
+    DB_REPLICA_URLS: List[str] = []
+    DB_REPLICA_HEALTH_CHECK_SECONDS: float = 10.0
+    # Replica health probes run inside a request: give up connecting quickly
+    DB_REPLICA_CONNECT_TIMEOUT_SECONDS: float = 2.0
+    # How long a user's reads stay on the primary after they write
+    READ_YOUR_WRITES_SECONDS: float = 5.0
+
+    # Per-request query counts in a Server-Timing header (see query_stats.py);
+    # QUERY_DEBUG also logs statements repeated within one request
+    SERVER_TIMING: bool = True
+    QUERY_DEBUG: bool = False
+    QUERY_REPEAT_THRESHOLD: int = 5
+
+    # Slow-query log (see slow_queries.py); a threshold of 0 turns it off
+    SLOW_QUERY_THRESHOLD_MS: float = 0.0
+    SLOW_QUERY_LOG_PATH: str = "slow_queries.jsonl"
+    SLOW_QUERY_LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    SLOW_QUERY_LOG_BACKUPS: int = 5
+    # Share of slow SELECTs re-run under EXPLAIN (ANALYZE, BUFFERS)
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.0
+
+    # Process pool for bcrypt (see hashing.py)
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
+
+    # Password hash policy (see utils.py); argon2 needs the argon2 extra
+    # (argon2-cffi) installed, or the app refuses to start
+    PASSWORD_HASH_SCHEME: Literal["bcrypt", "argon2"] = "bcrypt"
+    BCRYPT_ROUNDS: int = 12
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_TIME_COST: int = 3
+    ARGON2_PARALLELISM: int = 4
+
+    # Authenticated user cache (see user_cache.py)
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: float = 60.0
+
+    # Trust access token claims instead of looking the user up (see oauth2.py)
+    STATELESS_ACCESS_TOKENS: bool = False
+    # Verified access tokens remembered by oauth2.verify_access_token
+    TOKEN_CACHE_SIZE: int = 10000
+
+    # Shared secret for the /internal metrics routes, sent as X-Internal-Token;
+    # empty (the default) turns the routes off
+    INTERNAL_TOKEN: str = ""
+
+    # Token-bucket limits, "<count>/<second|minute|hour|day>" (see rate_limit.py)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_LOGIN: str = "10/minute"
+    RATE_LIMIT_REFRESH: str = "30/minute"
+    RATE_LIMIT_CREATE_USER: str = "5/minute"
+
 
 settings = Settings()  # type: ignore
@@ -1,14 +1,79 @@
-from sqlalchemy import create_engine
+import math
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from urllib.parse import quote_plus
 from .config import settings
+from .pool_metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool
 
 DB_URL = f"postgresql+psycopg2://{quote_plus(settings.DB_USERNAME)}:{quote_plus(settings.DB_PASSWORD)}@{settings.DB_HOSTNAME}:{settings.DB_PORT}/{settings.DB_NAME}"
+ASYNC_DB_URL = f"postgresql+asyncpg://{quote_plus(settings.DB_USERNAME)}:{quote_plus(settings.DB_PASSWORD)}@{settings.DB_HOSTNAME}:{settings.DB_PORT}/{settings.DB_NAME}"
 
-engine = create_engine(DB_URL)
+
+def _engine_options():
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "query_cache_size": settings.DB_QUERY_CACHE_SIZE,
+    }
+
+
+def _statement_timeout_args(asyncpg: bool = False):
+    timeout = settings.DB_STATEMENT_TIMEOUT_MS
+    if timeout <= 0:
+        return {}
+    if asyncpg:
+        return {"server_settings": {"statement_timeout": str(timeout)}}
+    return {"options": f"-c statement_timeout={timeout}"}
+
+
+def _connect_timeout_args(timeout: float, asyncpg: bool = False):
+    if timeout <= 0:
+        return {}
+    if asyncpg:
+        return {"timeout": timeout}
+    # libpq takes whole seconds
+    return {"connect_timeout": max(1, math.ceil(timeout))}
+
+
+def create_engines(url, connect_timeout: float = 0):
+    """Sync (psycopg2) and async (asyncpg) engines for one Postgres server;
+    a connect_timeout of 0 waits as long as the OS does"""
+    url = make_url(url)
+    sync_engine = create_engine(
+        url.set(drivername="postgresql+psycopg2"),
+        poolclass=InstrumentedQueuePool,
+        connect_args={
+            **_statement_timeout_args(),
+            **_connect_timeout_args(connect_timeout),
+        },
+        **_engine_options(),
+    )
+    async_engine = create_async_engine(
+        url.set(drivername="postgresql+asyncpg"),
+        poolclass=InstrumentedAsyncQueuePool,
+        connect_args={
+            **_statement_timeout_args(asyncpg=True),
+            **_connect_timeout_args(connect_timeout, asyncpg=True),
+        },
+        **_engine_options(),
+    )
+    return sync_engine, async_engine
+
+
+engine, async_engine = create_engines(DB_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async stack for async def routes. Objects stay usable after commit, since
+# an AsyncSession cannot lazily reload expired attributes during serialization
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
 
@@ -18,3 +83,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
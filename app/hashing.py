@@ -0,0 +1,125 @@
+"""
+Password hashing off the request path.
+
+bcrypt and argon2 (see utils.py) are deliberately slow CPU work. Running
+them in AnyIO's worker threads holds the GIL and starves every other sync
+endpoint, so hashes and verifications go to a dedicated process pool
+instead. The pool is bounded: at most PASSWORD_HASH_WORKERS jobs run and
+PASSWORD_HASH_QUEUE_SIZE wait; anything beyond that is rejected with 503 so
+callers back off instead of piling up. metrics() reports the counters
+needed to size both settings.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException, status
+from . import utils
+from .config import settings
+
+
+def _timed(func, *args):
+    """Run func in the worker and report how long the work itself took"""
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._submitted = 0
+        self._rejected = 0
+        self._completed = 0
+        self._failed = 0
+        self._run_seconds = 0.0
+        self._wait_seconds = 0.0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a threaded server process is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _admit(self):
+        with self._lock:
+            if self._in_flight >= self.workers + self.queue_size:
+                self._rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many concurrent password operations",
+                    headers={"Retry-After": "1"},
+                )
+            self._submitted += 1
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+
+    async def run(self, func, *args):
+        self._admit()
+        started = time.perf_counter()
+        try:
+            future = self._get_executor().submit(_timed, func, *args)
+            result, run_seconds = await asyncio.wrap_future(future)
+        except BaseException:
+            with self._lock:
+                self._in_flight -= 1
+                self._failed += 1
+            raise
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+            self._run_seconds += run_seconds
+            self._wait_seconds += max(elapsed - run_seconds, 0.0)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self.run(utils.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self.run(utils.verify, password, hashed_password)
+
+    async def verify_and_update(self, password: str, hashed_password: str):
+        return await self.run(utils.verify_and_update, password, hashed_password)
+
+    def metrics(self):
+        with self._lock:
+            completed = self._completed
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "in_flight": self._in_flight,
+                "queued": max(self._in_flight - self.workers, 0),
+                "peak_in_flight": self._peak_in_flight,
+                "submitted": self._submitted,
+                "rejected": self._rejected,
+                "completed": completed,
+                "failed": self._failed,
+                "avg_run_ms": 1000 * self._run_seconds / completed if completed else 0.0,
+                "avg_wait_ms": (
+                    1000 * self._wait_seconds / completed if completed else 0.0
+                ),
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+)
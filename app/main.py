@@ -1,10 +1,38 @@
-from fastapi import FastAPI, status
+import math
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
-from .routers import users, transactions, auth, categories, accounts, goals, reminders
+from fastapi.responses import JSONResponse, RedirectResponse
+from .routers import (
+    users,
+    transactions,
+    auth,
+    categories,
+    accounts,
+    goals,
+    reminders,
+    sync,
+    forecast,
+    internal,
+)
+from . import utils
+from .hashing import hasher
+from .query_stats import QueryStatsMiddleware
+from .replicas import ReadYourWritesMiddleware
+from .slow_queries import slow_query_log
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    utils.check_backend(utils.pwd_context)
+    yield
+    hasher.shutdown()
+    slow_query_log.close()
 
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 origins = ["*"]
 
@@ -15,6 +43,24 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+
+
+@app.exception_handler(RequestValidationError)
+async def request_validation_error(request: Request, exc: RequestValidationError):
+    # Like FastAPI's own handler, but a rejected NaN or Infinity is echoed
+    # back as a string: JSON has no such numbers and the response would fail
+    errors = [
+        {**error, "input": str(error["input"])}
+        if isinstance(error.get("input"), float) and not math.isfinite(error["input"])
+        else error
+        for error in exc.errors()
+    ]
+    return JSONResponse(
+        status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+        content={"detail": jsonable_encoder(errors)},
+    )
 
 
 app.include_router(auth.router)
@@ -24,6 +70,9 @@ app.include_router(categories.router)
 app.include_router(accounts.router)
 app.include_router(goals.router)
 app.include_router(reminders.router)
+app.include_router(sync.router)
+app.include_router(forecast.router)
+app.include_router(internal.router)
 
 
 @app.get("/")
@@ -1,5 +1,6 @@
 from sqlalchemy import (
     Column,
+    BigInteger,
     Integer,
     String,
     Float,
@@ -7,13 +8,32 @@ from sqlalchemy import (
     Boolean,
     Date,
     Interval,
+    Index,
 )
 from sqlalchemy.sql.sqltypes import TIMESTAMP
 from sqlalchemy.sql.expression import text
 from sqlalchemy.orm import relationship
+from sqlalchemy import event, DDL
+from datetime import date
 from .database import Base
 
 
+# Trigram indexes below need the pg_trgm extension
+event.listen(
+    Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+)
+
+
+def trigram_index(name: str, column: str):
+    """GIN index serving case-insensitive substring search on a text column"""
+    return Index(
+        name,
+        column,
+        postgresql_using="gin",
+        postgresql_ops={column: "gin_trgm_ops"},
+    )
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -33,11 +53,15 @@ class Category(Base):
 
     id = Column(Integer, primary_key=True, nullable=False)
     name = Column(String, nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True
+    )
     created_at = Column(
         TIMESTAMP(timezone=True), nullable=False, server_default=text("now()")
     )
 
+    __table_args__ = (trigram_index("ix_categories_name_trgm", "name"),)
+
     user = relationship("User")
 
 
@@ -48,12 +72,14 @@ class Account(Base):
     name = Column(String, nullable=False)
     balance = Column(Float, nullable=False, default=0.0)
     user_id = Column(
-        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
     )
     created_at = Column(
         TIMESTAMP(timezone=True), nullable=False, server_default=text("now()")
     )
 
+    __table_args__ = (trigram_index("ix_accounts_name_trgm", "name"),)
+
     user = relationship("User")
 
 
@@ -63,13 +89,17 @@ class Transaction(Base):
     id = Column(Integer, primary_key=True, nullable=False)
     title = Column(String, nullable=False)
     amount = Column(Float, nullable=False)
-    from_account_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE"), nullable=True)
-    to_account_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE"), nullable=True)
+    from_account_id = Column(
+        Integer, ForeignKey("accounts.id", ondelete="CASCADE"), nullable=True, index=True
+    )
+    to_account_id = Column(
+        Integer, ForeignKey("accounts.id", ondelete="CASCADE"), nullable=True, index=True
+    )
     user_id = Column(
         Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
     )
     category_id = Column(
-        Integer, ForeignKey("categories.id", ondelete="CASCADE"), nullable=False
+        Integer, ForeignKey("categories.id", ondelete="CASCADE"), nullable=False, index=True
     )
     done_at = Column(
         TIMESTAMP(timezone=True), nullable=False, server_default=text("now()")
@@ -81,6 +111,25 @@ class Transaction(Base):
         onupdate=text("now()"),
     )
     is_deleted = Column(Boolean, nullable=False, default=False)
+    # Position in the owner's change feed, in commit order (see routers/sync.py)
+    change_seq = Column(BigInteger, nullable=False, server_default=text("0"))
+
+    __table_args__ = (
+        # Listing and keyset pagination of live transactions
+        Index(
+            "ix_transactions_user_id_done_at",
+            user_id,
+            done_at.desc(),
+            id,
+            postgresql_where=text("NOT is_deleted"),
+        ),
+        # Change feed, includes soft-deleted rows
+        Index("ix_transactions_user_id_updated_at", user_id, updated_at, id),
+        Index("ix_transactions_user_id_change_seq", user_id, change_seq, id),
+        trigram_index("ix_transactions_title_trgm", "title"),
+    )
+    # Fetch server-generated timestamps via RETURNING instead of a later SELECT
+    __mapper_args__ = {"eager_defaults": True}
 
     user = relationship("User")
     category = relationship("Category")
@@ -93,10 +142,10 @@ class Goal(Base):
 
     id = Column(Integer, primary_key=True, nullable=False)
     user_id = Column(
-        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
     )
     account_id = Column(
-        Integer, ForeignKey("accounts.id", ondelete="CASCADE"), nullable=False
+        Integer, ForeignKey("accounts.id", ondelete="CASCADE"), nullable=False, index=True
     )
     target_amount = Column(Float, nullable=False)
     deadline = Column(Date, nullable=False)
@@ -108,13 +157,28 @@ class Goal(Base):
     user = relationship("User")
     account = relationship("Account")
 
+    # Progress is read off the linked account's balance
+    @property
+    def current_amount(self):
+        return self.account.balance
+
+    @property
+    def progress_ratio(self):
+        if self.target_amount == 0:
+            return 1.0
+        return self.current_amount / self.target_amount
+
+    @property
+    def days_remaining(self):
+        return (self.deadline - date.today()).days
+
 
 class Reminder(Base):
     __tablename__ = "reminders"
 
     id = Column(Integer, primary_key=True, nullable=False)
     user_id = Column(
-        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
     )
     title = Column(String, nullable=False)
     amount = Column(Float, nullable=False)
@@ -128,3 +192,55 @@ class Reminder(Base):
     )
 
     user = relationship("User")
+
+
+# Last sync-feed number handed out per user (see transactions.reserve_change_seqs).
+# Not a users column: its row stays locked until a write commits, and logins
+# update the users row
+class ChangeCounter(Base):
+    __tablename__ = "change_counters"
+
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    change_seq = Column(BigInteger, nullable=False, default=0)
+
+
+# Sync-feed deletions of transactions that ON DELETE CASCADE removed along with
+# their account (see routers/sync.py)
+class TransactionTombstone(Base):
+    __tablename__ = "transaction_tombstones"
+
+    transaction_id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    change_seq = Column(BigInteger, nullable=False)
+
+    __table_args__ = (
+        Index(
+            "ix_transaction_tombstones_user_id_change_seq",
+            user_id,
+            change_seq,
+            transaction_id,
+        ),
+    )
+
+
+# Per-account monthly totals, kept in step with transaction writes (see rollups.py)
+class MonthlyRollup(Base):
+    __tablename__ = "monthly_rollups"
+
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    category_id = Column(
+        Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True
+    )
+    account_id = Column(
+        Integer, ForeignKey("accounts.id", ondelete="CASCADE"), primary_key=True
+    )
+    month = Column(Date, primary_key=True)
+    inflow = Column(Float, nullable=False, default=0.0)
+    outflow = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
@@ -1,9 +1,17 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security.oauth2 import OAuth2PasswordBearer
 import jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from . import schemas, database, models, config
+from .user_cache import CurrentUser, user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
@@ -11,6 +19,115 @@ SECRET_KEY = config.settings.SECRET_KEY
 ALGORITHM = config.settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = config.settings.ACCESS_TOKEN_EXPIRE_MINUTES
 REFRESH_TOKEN_EXPIRE_DAYS = config.settings.REFRESH_TOKEN_EXPIRE_DAYS
+STATELESS_ACCESS_TOKENS = config.settings.STATELESS_ACCESS_TOKENS
+
+
+@dataclass(frozen=True)
+class TokenPrincipal:
+    """User identity taken from access token claims alone"""
+
+    id: int
+    username: str
+    token_version: int
+
+
+class RevokedTokenVersions:
+    """
+    Per-user lowest token_version still accepted in stateless mode.
+
+    Entries only need to outlive the access tokens they reject, so they are
+    dropped ACCESS_TOKEN_EXPIRE_MINUTES after being recorded. The set is per
+    process: other workers keep accepting revoked tokens until they expire,
+    which is why stateless mode wants short access token lifetimes.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def revoke(self, user_id: int, below_version: Optional[int] = None):
+        """Reject tokens older than below_version, or all tokens when None"""
+        now = time.monotonic()
+        with self._lock:
+            for key in [k for k, v in self._versions.items() if v[1] < now]:
+                del self._versions[key]
+            version = float("inf") if below_version is None else below_version
+            current = self._versions.get(user_id, (version, 0.0))[0]
+            self._versions[user_id] = (max(version, current), now + self.ttl)
+
+    def is_revoked(self, user_id: int, token_version: int):
+        with self._lock:
+            entry = self._versions.get(user_id)
+        return (
+            entry is not None
+            and entry[1] >= time.monotonic()
+            and token_version < entry[0]
+        )
+
+    def clear(self):
+        with self._lock:
+            self._versions.clear()
+
+
+revoked_versions = RevokedTokenVersions(ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+
+class VerifiedTokenCache:
+    """
+    LRU of access tokens that already passed verification.
+
+    Keyed on a SHA-256 digest of the token and holding the decoded TokenData
+    with the token's exp, so a reused bearer token skips the HMAC check,
+    JSON parsing and model construction until it expires. Entries verified
+    under a different secret key are discarded as soon as the key changes.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._entries = OrderedDict()
+        self._secret_key = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(token: str):
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str, secret_key: str):
+        key = self.digest(token)
+        with self._lock:
+            if secret_key != self._secret_key:
+                self._entries.clear()
+                self._secret_key = secret_key
+                return None
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, token: str, secret_key: str, token_data, exp: float):
+        if self.size <= 0:
+            return
+        key = self.digest(token)
+        with self._lock:
+            if secret_key != self._secret_key:
+                self._entries.clear()
+                self._secret_key = secret_key
+            self._entries[key] = (token_data, exp)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+verified_tokens = VerifiedTokenCache(size=config.settings.TOKEN_CACHE_SIZE)
 
 
 def create_access_token(data: dict):
@@ -32,15 +149,25 @@ def create_refresh_token(data: dict):
 
 
 def verify_access_token(token: str, credentials_exception):
+    token_data = verified_tokens.get(token, SECRET_KEY)
+    if token_data is not None:
+        return token_data
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=ALGORITHM)
         id: str = payload.get("user_id")
         if id is None:
             raise credentials_exception
-        token_data = schemas.TokenData(id=str(id))
+        token_data = schemas.TokenData(
+            id=str(id),
+            token_version=payload.get("token_version"),
+            username=payload.get("username"),
+        )
     except:
         raise credentials_exception
 
+    if "exp" in payload:
+        verified_tokens.put(token, SECRET_KEY, token_data, payload["exp"])
     return token_data
 
 
@@ -64,16 +191,105 @@ def verify_refresh_token(token: str, credentials_exception):
     return token_data
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)
-):
-    credentials_exception = HTTPException(
+def user_id_from_scope(scope) -> Optional[int]:
+    """User id of a request's valid bearer token, for code outside dependencies"""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer":
+                return None
+            try:
+                token_data = verify_access_token(token, _credentials_exception())
+            except HTTPException:
+                return None
+            return int(token_data.id)  # type: ignore
+    return None
+
+
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Couldn't validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    token_data = verify_access_token(token, credentials_exception)
-    user = db.query(models.User).filter(models.User.id == token_data.id).first()
-    if user is None:
+
+
+async def _load_user(
+    token_data: schemas.TokenData, db: AsyncSession, credentials_exception
+):
+    user_id = int(token_data.id)  # type: ignore
+    cached = user_cache.get(user_id, token_data.token_version)
+    if cached is not None:
+        return cached
+
+    result = await db.execute(
+        select(
+            models.User.id,
+            models.User.username,
+            models.User.login,
+            models.User.token_version,
+            models.User.created_at,
+        ).where(models.User.id == user_id)
+    )
+    row = result.first()
+    if row is None:
         raise credentials_exception
+    # /logout and /refresh bump token_version, and tokens issued before that
+    # are dead. The version is shared by all of the user's devices, so a
+    # refresh on one device also ends the access tokens of the others, as the
+    # stateless revocation list does; the users row keeps a single refresh
+    # token, so those devices have to log in again anyway
+    if (
+        token_data.token_version is not None
+        and row.token_version != token_data.token_version
+    ):
+        raise credentials_exception
+    user = CurrentUser(**row._asdict())
+    user_cache.put(token_data.token_version, user)
     return user
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(database.get_async_db),
+):
+    """
+    Identify the caller. With STATELESS_ACCESS_TOKENS on, tokens carrying
+    token_version and username are trusted as they are and a TokenPrincipal
+    is returned without touching the database; otherwise (or for older
+    tokens) the user is loaded as a CurrentUser. Routers may only rely on
+    id and username here and use get_current_user_record for anything else.
+    """
+    credentials_exception = _credentials_exception()
+    token_data = verify_access_token(token, credentials_exception)
+
+    if (
+        STATELESS_ACCESS_TOKENS
+        and token_data.token_version is not None
+        and token_data.username is not None
+    ):
+        user_id = int(token_data.id)  # type: ignore
+        if revoked_versions.is_revoked(user_id, token_data.token_version):
+            raise credentials_exception
+        return TokenPrincipal(
+            id=user_id,
+            username=token_data.username,
+            token_version=token_data.token_version,
+        )
+
+    return await _load_user(token_data, db, credentials_exception)
+
+
+async def get_current_user_record(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(database.get_async_db),
+):
+    """Like get_current_user, but always backed by the users table"""
+    credentials_exception = _credentials_exception()
+    token_data = verify_access_token(token, credentials_exception)
+    user_id = int(token_data.id)  # type: ignore
+    if token_data.token_version is not None and revoked_versions.is_revoked(
+        user_id, token_data.token_version
+    ):
+        raise credentials_exception
+    return await _load_user(token_data, db, credentials_exception)
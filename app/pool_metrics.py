@@ -0,0 +1,119 @@
+"""
+Connection pool instrumentation.
+
+SQLAlchemy's QueuePool blocks callers silently once pool_size + max_overflow
+connections are checked out. The pool classes below time every checkout
+(including waiting on the queue and opening overflow connections) and count
+the callers currently waiting, so /internal/pool can show whether a worker's
+pool is too small before requests start failing with pool timeouts.
+"""
+
+import bisect
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds of the checkout-wait histogram buckets, in milliseconds
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters = 0
+        self._peak_waiters = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._wait_counts = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def start_wait(self):
+        with self._lock:
+            self._waiters += 1
+            self._peak_waiters = max(self._peak_waiters, self._waiters)
+
+    def end_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self._waiters -= 1
+            if timed_out:
+                self._timeouts += 1
+                return
+            self._checkouts += 1
+            self._wait_seconds += seconds
+            self._max_wait_seconds = max(self._max_wait_seconds, seconds)
+            self._wait_counts[bisect.bisect_left(WAIT_BUCKETS_MS, seconds * 1000)] += 1
+
+    def snapshot(self):
+        with self._lock:
+            checkouts = self._checkouts
+            histogram = {
+                f"le_{bound}ms": count
+                for bound, count in zip(WAIT_BUCKETS_MS, self._wait_counts)
+            }
+            histogram["inf"] = self._wait_counts[-1]
+            return {
+                "waiters": self._waiters,
+                "peak_waiters": self._peak_waiters,
+                "checkouts": checkouts,
+                "timeouts": self._timeouts,
+                "avg_wait_ms": (
+                    1000 * self._wait_seconds / checkouts if checkouts else 0.0
+                ),
+                "max_wait_ms": 1000 * self._max_wait_seconds,
+                "wait_histogram": histogram,
+            }
+
+
+class _InstrumentedPoolMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        self.metrics.start_wait()
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.end_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        except BaseException:
+            self.metrics.end_wait(time.perf_counter() - started)
+            raise
+        self.metrics.end_wait(time.perf_counter() - started)
+        return conn
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep the counters going
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_status(pool):
+    """Occupancy and checkout-wait counters of an engine's pool"""
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            {
+                "size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            }
+        )
+    if isinstance(pool, _InstrumentedPoolMixin):
+        status.update(pool.metrics.snapshot())
+    return status
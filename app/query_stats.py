@@ -0,0 +1,124 @@
+"""
+Per-request SQL statement counting.
+
+QueryStatsMiddleware gives each HTTP request a RequestQueries record held
+in a context variable. Engine-wide cursor events add every statement's
+count and duration to it, whichever engine ran it (sync, async or a
+replica). The totals are sent back as a Server-Timing header, e.g.
+
+    Server-Timing: db;dur=4.210;desc="3 queries"
+
+so browser dev tools and load tests show where request time goes. The
+header goes out with the response start; statements run while streaming a
+body (e.g. /transactions/export) are not in it.
+
+With QUERY_DEBUG on, statements are also tallied by SQL text, and any one
+run QUERY_REPEAT_THRESHOLD or more times in a single request is logged: the
+same SELECT issued once per row of a parent result is the mark of an N+1
+lazy load.
+"""
+
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RequestQueries:
+    def __init__(self, track_statements: bool = False, scope=None):
+        self.scope = scope
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter() if track_statements else None
+
+    def repeated(self, threshold: int):
+        """Statements run at least threshold times, most repeated first"""
+        if self.statements is None:
+            return []
+        return [
+            (statement, count)
+            for statement, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+    def server_timing(self):
+        return f'db;dur={1000 * self.seconds:.3f};desc="{self.count} queries"'
+
+
+_current: ContextVar[Optional[RequestQueries]] = ContextVar(
+    "request_queries", default=None
+)
+
+
+def current_queries() -> Optional[RequestQueries]:
+    """Record of the request being served, or None outside requests"""
+    return _current.get()
+
+
+@contextmanager
+def track_queries(track_statements: bool = False, scope=None):
+    """Count the statements run in this context (and threads started from it)"""
+    queries = RequestQueries(track_statements, scope)
+    token = _current.set(queries)
+    try:
+        yield queries
+    finally:
+        _current.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        context._query_stats_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    queries = _current.get()
+    started = getattr(context, "_query_stats_started", None)
+    if queries is None or started is None:
+        return
+    queries.count += 1
+    queries.seconds += time.perf_counter() - started
+    if queries.statements is not None:
+        queries.statements[statement] += 1
+
+
+def _log_repeats(scope, queries: RequestQueries):
+    for statement, count in queries.repeated(settings.QUERY_REPEAT_THRESHOLD):
+        logger.warning(
+            "%s %s ran the same statement %d times (likely N+1): %s",
+            scope["method"],
+            scope["path"],
+            count,
+            " ".join(statement.split())[:300],
+        )
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and settings.SERVER_TIMING:
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", queries.server_timing())
+            await send(message)
+
+        with track_queries(settings.QUERY_DEBUG, scope) as queries:
+            await self.app(scope, receive, send_with_timing)
+        if settings.QUERY_DEBUG:
+            _log_repeats(scope, queries)
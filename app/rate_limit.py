@@ -0,0 +1,122 @@
+"""
+Token-bucket rate limiting for the expensive unauthenticated routes.
+
+Every (route, key) pair owns a bucket of `capacity` tokens refilled at
+capacity/period per second; a request takes one token or is rejected with
+429 and a Retry-After telling when the next token arrives. Limits are
+configured per route in config.Settings as "<count>/<second|minute|hour|day>".
+The dependencies run before the route's own work, so rejected requests
+never reach the database or the password hasher.
+
+Buckets live in a backend: MemoryBackend keeps them in process. A shared
+store (e.g. Redis) can be plugged in by assigning any object with the same
+take() method to limiter.backend.
+"""
+
+import math
+import threading
+import time
+from dataclasses import dataclass
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security.oauth2 import OAuth2PasswordRequestForm
+from .config import settings
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+@dataclass(frozen=True)
+class Rule:
+    capacity: int
+    period: float
+
+    @property
+    def rate(self):
+        return self.capacity / self.period
+
+    @classmethod
+    def parse(cls, value: str):
+        count, _, period = value.partition("/")
+        if period not in PERIODS or not count.strip().isdigit() or int(count) < 1:
+            raise ValueError(f"Invalid rate limit {value!r}")
+        return cls(capacity=int(count), period=PERIODS[period])
+
+
+class MemoryBackend:
+    """In-process buckets; idle buckets are swept once max_keys is exceeded"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rule: Rule, now: float) -> float:
+        """Take a token; return 0 on success or seconds until one is available"""
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (rule.capacity, now, 0))
+            tokens = min(rule.capacity, tokens + (now - updated) * rule.rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now, rule.period)
+                if len(self._buckets) > self.max_keys:
+                    self._sweep(now)
+                return 0.0
+            self._buckets[key] = (tokens, now, rule.period)
+            return (1 - tokens) / rule.rate
+
+    def _sweep(self, now: float):
+        # Buckets idle for a full period are back to capacity anyway
+        for key in [k for k, v in self._buckets.items() if now - v[1] >= v[2]]:
+            del self._buckets[key]
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class RateLimiter:
+    def __init__(self, backend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+
+    def hit(self, route: str, keys, rule: Rule):
+        if not self.enabled:
+            return
+        now = time.time()
+        for key in keys:
+            wait = self.backend.take(f"{route}:{key}", rule, now)
+            if wait > 0:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many requests",
+                    headers={"Retry-After": str(math.ceil(wait))},
+                )
+
+
+limiter = RateLimiter(MemoryBackend(), enabled=settings.RATE_LIMIT_ENABLED)
+
+
+def _client_ip(request: Request):
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(route: str, limit: str):
+    """Dependency limiting a route per client IP"""
+    rule = Rule.parse(limit)
+
+    def dependency(request: Request):
+        limiter.hit(route, [f"ip:{_client_ip(request)}"], rule)
+
+    return dependency
+
+
+def login_rate_limit(limit: str):
+    """Dependency limiting /login per client IP and per attempted login"""
+    rule = Rule.parse(limit)
+
+    def dependency(request: Request, login_data: OAuth2PasswordRequestForm = Depends()):
+        limiter.hit(
+            "login",
+            [f"ip:{_client_ip(request)}", f"login:{login_data.username.lower()}"],
+            rule,
+        )
+
+    return dependency
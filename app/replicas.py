@@ -0,0 +1,261 @@
+"""
+Read-replica routing for GET routes.
+
+Read-only routes take their session from get_read_db / get_async_read_db.
+When DB_REPLICA_URLS is set these hand out a session on one of the
+replicas, round-robin over the healthy ones, and fall back to the primary
+when none is healthy. Each replica is probed with SELECT 1 at most once per
+DB_REPLICA_HEALTH_CHECK_SECONDS, by the request that finds the probe due.
+Replica connections give up after DB_REPLICA_CONNECT_TIMEOUT_SECONDS, so an
+unreachable replica delays that request by at most this long. Without
+replicas both dependencies simply return the primary session.
+
+Replicas lag behind the primary, so a user could write something and then
+read an older state back. ReadYourWritesMiddleware records each successful
+non-GET request of an authenticated user; that user's reads stay on the
+primary for READ_YOUR_WRITES_SECONDS afterwards. Non-GET routes that only
+read (a POST carrying a query too long for a URL) are marked @read_only and
+are not recorded. The record is per worker process, like the other
+in-process caches: a read served by another worker can still go to a
+replica, so sticky load balancing keeps the guarantee.
+"""
+
+import itertools
+import threading
+import time
+from fastapi import Depends
+from sqlalchemy import exc, make_url, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from . import database, oauth2
+from .config import settings
+from .pool_metrics import pool_status
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class RecentWrites:
+    """Users who wrote within the last `window` seconds"""
+
+    def __init__(self, window: float, max_users: int = 100000):
+        self.window = window
+        self.max_users = max_users
+        self._until = {}
+        self._lock = threading.Lock()
+
+    def record(self, user_id: int):
+        now = time.monotonic()
+        with self._lock:
+            self._until[user_id] = now + self.window
+            if len(self._until) > self.max_users:
+                for key in [k for k, v in self._until.items() if v <= now]:
+                    del self._until[key]
+
+    def is_recent(self, user_id: int):
+        with self._lock:
+            return self._until.get(user_id, 0.0) > time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._until.clear()
+
+    def __len__(self):
+        return len(self._until)
+
+
+class Replica:
+    def __init__(self, url, engines):
+        self.url = make_url(url)
+        self.engine, self.async_engine = engines
+        self.session_factory = sessionmaker(
+            autocommit=False, autoflush=False, bind=self.engine
+        )
+        self.async_session_factory = async_sessionmaker(
+            self.async_engine, autoflush=False, expire_on_commit=False
+        )
+        self.healthy = True
+        self.checked_at = None
+        self.reads = 0
+
+    def check(self):
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except (exc.DBAPIError, OSError):
+            self.healthy = False
+        else:
+            self.healthy = True
+
+    async def check_async(self):
+        try:
+            async with self.async_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        except (exc.DBAPIError, OSError):
+            self.healthy = False
+        else:
+            self.healthy = True
+
+
+def create_replica_engines(url):
+    return database.create_engines(
+        url, connect_timeout=settings.DB_REPLICA_CONNECT_TIMEOUT_SECONDS
+    )
+
+
+class ReplicaSet:
+    def __init__(
+        self, urls, check_interval: float, engine_factory=create_replica_engines
+    ):
+        self.replicas = [Replica(url, engine_factory(url)) for url in urls]
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._turn = itertools.count()
+        self._primary_reads = 0
+        self._sticky_reads = 0
+
+    def _due(self, user_id: int):
+        """Replicas whose health check is due, or None when reads go to the primary"""
+        if recent_writes.is_recent(user_id):
+            with self._lock:
+                self._sticky_reads += 1
+            return None
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            for replica in self.replicas:
+                if (
+                    replica.checked_at is None
+                    or now - replica.checked_at >= self.check_interval
+                ):
+                    # Claimed now so concurrent requests don't probe it too
+                    replica.checked_at = now
+                    due.append(replica)
+        return due
+
+    def _pick(self):
+        with self._lock:
+            healthy = [replica for replica in self.replicas if replica.healthy]
+            if not healthy:
+                self._primary_reads += 1
+                return None
+            replica = healthy[next(self._turn) % len(healthy)]
+            replica.reads += 1
+            return replica
+
+    def choose(self, user_id: int):
+        """Replica to serve a read by user_id, or None for the primary"""
+        if not self.replicas:
+            return None
+        due = self._due(user_id)
+        if due is None:
+            return None
+        for replica in due:
+            replica.check()
+        return self._pick()
+
+    async def choose_async(self, user_id: int):
+        if not self.replicas:
+            return None
+        due = self._due(user_id)
+        if due is None:
+            return None
+        for replica in due:
+            await replica.check_async()
+        return self._pick()
+
+    def metrics(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "primary_reads": self._primary_reads,
+                "sticky_reads": self._sticky_reads,
+                "recent_writers": len(recent_writes),
+                "replicas": [
+                    {
+                        "url": replica.url.render_as_string(hide_password=True),
+                        "healthy": replica.healthy,
+                        "reads": replica.reads,
+                        "checked_seconds_ago": (
+                            None
+                            if replica.checked_at is None
+                            else now - replica.checked_at
+                        ),
+                        "pool": {
+                            "sync": pool_status(replica.engine.pool),
+                            "async": pool_status(replica.async_engine.pool),
+                        },
+                    }
+                    for replica in self.replicas
+                ],
+            }
+
+
+recent_writes = RecentWrites(window=settings.READ_YOUR_WRITES_SECONDS)
+replica_set = ReplicaSet(
+    settings.DB_REPLICA_URLS, check_interval=settings.DB_REPLICA_HEALTH_CHECK_SECONDS
+)
+
+
+def get_read_db(
+    db: Session = Depends(database.get_db),
+    user=Depends(oauth2.get_current_user),
+):
+    replica = replica_set.choose(user.id)
+    if replica is None:
+        yield db
+        return
+    with replica.session_factory() as replica_db:
+        yield replica_db
+
+
+async def get_async_read_db(
+    db: AsyncSession = Depends(database.get_async_db),
+    user=Depends(oauth2.get_current_user),
+):
+    replica = await replica_set.choose_async(user.id)
+    if replica is None:
+        yield db
+        return
+    async with replica.async_session_factory() as replica_db:
+        yield replica_db
+
+
+def read_only(endpoint):
+    """Marks a non-GET endpoint that does not write"""
+    endpoint.read_only = True
+    return endpoint
+
+
+def _is_read_only(scope):
+    endpoint = getattr(scope.get("route"), "endpoint", None)
+    return getattr(endpoint, "read_only", False)
+
+
+class ReadYourWritesMiddleware:
+    """Pins a user's reads to the primary right after a successful write"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] in SAFE_METHODS
+            or not replica_set.replicas
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_recording_writes(message):
+            # Before the response reaches the client, so its next read sticks
+            if (
+                message["type"] == "http.response.start"
+                and message["status"] < 400
+                and not _is_read_only(scope)
+            ):
+                user_id = oauth2.user_id_from_scope(scope)
+                if user_id is not None:
+                    recent_writes.record(user_id)
+            await send(message)
+
+        await self.app(scope, receive, send_recording_writes)
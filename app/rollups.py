@@ -0,0 +1,179 @@
+"""
+Incrementally maintained monthly rollups of transactions.
+
+Every transaction contributes one "leg" per account it touches: an outflow
+for from_account_id and an inflow for to_account_id. Legs are summed per
+(user, category, account, month) into models.MonthlyRollup. The writers in
+routers/transactions.py apply the same statement in the same DB transaction
+as the row change; rebuild and verify are exposed on the command line:
+
+    python -m app.rollups rebuild [--user-id ID]
+    python -m app.rollups verify [--user-id ID]
+"""
+
+import argparse
+import sys
+from typing import List, Optional
+from sqlalchemy import Date, Float, delete, func, literal, literal_column, select
+from sqlalchemy import union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from . import models
+from .database import SessionLocal
+
+TOLERANCE = 1e-6
+COLUMNS = ["user_id", "category_id", "account_id", "month", "inflow", "outflow", "count"]
+
+
+def _aggregate(condition, sign: int = 1):
+    """SELECT rolling up the legs of transactions matching condition"""
+    trans = models.Transaction
+    outflow_legs = select(
+        trans.user_id,
+        trans.category_id,
+        trans.from_account_id.label("account_id"),
+        trans.done_at,
+        literal(0.0, Float).label("inflow"),
+        trans.amount.label("outflow"),
+    ).where(condition, trans.from_account_id != None)
+    inflow_legs = select(
+        trans.user_id,
+        trans.category_id,
+        trans.to_account_id.label("account_id"),
+        trans.done_at,
+        trans.amount.label("inflow"),
+        literal(0.0, Float).label("outflow"),
+    ).where(condition, trans.to_account_id != None)
+    legs = union_all(outflow_legs, inflow_legs).subquery("legs")
+
+    # Months are bucketed in UTC; the unit is inlined so GROUP BY matches
+    month = func.date_trunc(
+        literal_column("'month'"), func.timezone("UTC", legs.c.done_at)
+    ).cast(Date)
+    return select(
+        legs.c.user_id,
+        legs.c.category_id,
+        legs.c.account_id,
+        month.label("month"),
+        (sign * func.sum(legs.c.inflow)).label("inflow"),
+        (sign * func.sum(legs.c.outflow)).label("outflow"),
+        (sign * func.count()).label("count"),
+    ).group_by(legs.c.user_id, legs.c.category_id, legs.c.account_id, month)
+
+
+def apply_transactions_statement(ids: List[int], sign: int):
+    """The INSERT ... SELECT ... ON CONFLICT DO UPDATE run by apply_transactions"""
+    rollup = models.MonthlyRollup
+    stmt = insert(rollup).from_select(
+        COLUMNS, _aggregate(models.Transaction.id.in_(ids), sign)
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[
+            rollup.user_id,
+            rollup.category_id,
+            rollup.account_id,
+            rollup.month,
+        ],
+        set_={
+            "inflow": rollup.inflow + stmt.excluded.inflow,
+            "outflow": rollup.outflow + stmt.excluded.outflow,
+            "count": rollup.count + stmt.excluded.count,
+        },
+    )
+
+
+def apply_transactions(ids: List[int], sign: int, db: Session):
+    """Add (sign=1) or remove (sign=-1) the current state of transactions.
+
+    One statement, run in the caller's DB transaction. Call with -1 before
+    changing amount, category, accounts or done_at of a row and with 1
+    after flushing the change. Async callers execute
+    apply_transactions_statement themselves.
+    """
+    if not ids:
+        return
+    db.execute(apply_transactions_statement(ids, sign))
+
+
+def _live(user_id: Optional[int]):
+    condition = models.Transaction.is_deleted == False
+    if user_id is not None:
+        condition = condition & (models.Transaction.user_id == user_id)
+    return condition
+
+
+def rebuild(db: Session, user_id: Optional[int] = None):
+    """Recompute rollups from scratch (for everyone or one user). Does not commit."""
+    rollup = models.MonthlyRollup
+    clear = delete(rollup)
+    if user_id is not None:
+        clear = clear.where(rollup.user_id == user_id)
+    db.execute(clear)
+    db.execute(insert(rollup).from_select(COLUMNS, _aggregate(_live(user_id))))
+
+
+def verify(db: Session, user_id: Optional[int] = None):
+    """Diff stored rollups against a fresh aggregation.
+
+    Returns a list of mismatches as (key, stored, expected) tuples, where key
+    is (user_id, category_id, account_id, month) and values are
+    (inflow, outflow, count) or None when the row is missing.
+    """
+    rollup = models.MonthlyRollup
+    stored_query = select(
+        rollup.user_id,
+        rollup.category_id,
+        rollup.account_id,
+        rollup.month,
+        rollup.inflow,
+        rollup.outflow,
+        rollup.count,
+    ).where(rollup.count != 0)
+    if user_id is not None:
+        stored_query = stored_query.where(rollup.user_id == user_id)
+
+    stored = {tuple(row[:4]): tuple(row[4:]) for row in db.execute(stored_query)}
+    expected = {
+        tuple(row[:4]): tuple(row[4:])
+        for row in db.execute(_aggregate(_live(user_id)))
+    }
+
+    mismatches = []
+    for key in sorted(stored.keys() | expected.keys()):
+        have, want = stored.get(key), expected.get(key)
+        if (
+            have is None
+            or want is None
+            or have[2] != want[2]
+            or abs(have[0] - want[0]) > TOLERANCE
+            or abs(have[1] - want[1]) > TOLERANCE
+        ):
+            mismatches.append((key, have, want))
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.rollups")
+    parser.add_argument("command", choices=["rebuild", "verify"])
+    parser.add_argument("--user-id", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            rebuild(db, args.user_id)
+            db.commit()
+            print("Rollups rebuilt")
+            return 0
+
+        mismatches = verify(db, args.user_id)
+        for key, have, want in mismatches:
+            print(f"{key}: stored={have} expected={want}")
+        print(f"{len(mismatches)} mismatching rollup rows")
+        return 1 if mismatches else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
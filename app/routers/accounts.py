@@ -1,34 +1,39 @@
-from fastapi import Depends, Response, status, HTTPException, APIRouter
-from sqlalchemy.orm import Session
+from fastapi import Depends, Response, status, HTTPException, APIRouter, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, func, insert, literal_column, or_, select
 from typing import List, Optional
-from .. import models, schemas, oauth2
-from ..database import get_db
+from datetime import datetime
+from .. import models, schemas, oauth2, rollups
+from ..database import get_async_db
+from ..replicas import get_async_read_db
+from ..search import search_condition, search_rank
+from .transactions import reserve_change_seqs
 
 
 router = APIRouter(prefix="/accounts", tags=["Accounts"])
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=schemas.Account)
-def create_account(
+async def create_account(
     account: schemas.AccountCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: models.User = Depends(oauth2.get_current_user),
 ):
     new_account = models.Account(**account.model_dump())
     new_account.user_id = user.id
     db.add(new_account)
-    db.commit()
-    db.refresh(new_account)
+    await db.commit()
+    await db.refresh(new_account)
     return new_account
 
 
 @router.get("/{id}", response_model=schemas.Account)
-def get_account(
+async def get_account(
     id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     user: models.User = Depends(oauth2.get_current_user),
 ):
-    account = db.query(models.Account).filter(models.Account.id == id).first()
+    account = await db.get(models.Account, id)
     if account == None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Account was not found"
@@ -38,34 +43,104 @@ def get_account(
     return account
 
 
+@router.get("/{id}/history", response_model=schemas.AccountHistory)
+async def get_account_history(
+    id: int,
+    db: AsyncSession = Depends(get_async_read_db),
+    user: models.User = Depends(oauth2.get_current_user),
+    from_date: Optional[datetime] = Query(None, alias="from"),
+    to_date: Optional[datetime] = Query(None, alias="to"),
+    bucket: str = Query("day", pattern="^(day|week|month|year)$"),
+):
+    """
+    Closing balance, inflow and outflow of the account per time bucket.
+    Balances are replayed backwards from the current balance with a window
+    function, so no opening balance is needed. Buckets without
+    transactions are omitted.
+    """
+    account = await db.get(models.Account, id)
+    if account == None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Account was not found"
+        )
+    if account.user_id != user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
+
+    trans = models.Transaction
+    # bucket is validated against a fixed list, so it is safe to inline
+    unit = literal_column(f"'{bucket}'")
+    period = func.date_trunc(unit, trans.done_at)
+    inflow = func.sum(trans.amount).filter(trans.to_account_id == id)
+    outflow = func.sum(trans.amount).filter(trans.from_account_id == id)
+    activity = select(
+        period.label("period"),
+        func.coalesce(inflow, 0.0).label("inflow"),
+        func.coalesce(outflow, 0.0).label("outflow"),
+    ).where(
+        trans.is_deleted == False,
+        or_(trans.from_account_id == id, trans.to_account_id == id),
+    )
+    # Earlier buckets never affect later closing balances
+    if from_date is not None:
+        activity = activity.where(trans.done_at >= func.date_trunc(unit, from_date))
+    activity = activity.group_by(period).subquery("activity")
+
+    # Closing balance = current balance minus the net flow of all later buckets,
+    # read in the same statement so it is consistent with the transactions
+    current_balance = (
+        select(models.Account.balance)
+        .where(models.Account.id == id)
+        .scalar_subquery()
+    )
+    later_net = func.sum(activity.c.inflow - activity.c.outflow).over(
+        order_by=activity.c.period.desc(), rows=(None, -1)
+    )
+    series = select(
+        activity.c.period,
+        activity.c.inflow,
+        activity.c.outflow,
+        (current_balance - func.coalesce(later_net, 0.0)).label("balance"),
+    ).subquery("series")
+
+    query = select(series)
+    if to_date is not None:
+        query = query.where(series.c.period <= to_date)
+    points = (await db.execute(query.order_by(series.c.period))).all()
+
+    return schemas.AccountHistory(
+        account_id=id,
+        bucket=bucket,
+        points=[schemas.BalancePoint.model_validate(point) for point in points],
+    )
+
+
 @router.get("/", response_model=List[schemas.Account])
-def get_all_accounts(
-    db: Session = Depends(get_db),
+async def get_all_accounts(
+    db: AsyncSession = Depends(get_async_read_db),
     user: models.User = Depends(oauth2.get_current_user),
     limit: int = 100,
     search: Optional[str] = "",
 ):
-    accounts = (
-        db.query(models.Account)
-        .filter(
-            models.Account.user_id == user.id,
-            models.Account.name.contains(search),
+    query = select(models.Account).where(models.Account.user_id == user.id)
+
+    # Case-insensitive search, best matches first
+    if search:
+        query = query.where(search_condition(models.Account.name, search)).order_by(
+            search_rank(models.Account.name, search)
         )
-        .limit(limit)
-        .all()
-    )
-    return accounts
+
+    accounts = await db.scalars(query.limit(limit))
+    return accounts.all()
 
 
 @router.put("/{id}", response_model=schemas.Account)
-def update_account(
+async def update_account(
     id: int,
     updated_account: schemas.AccountUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: models.User = Depends(oauth2.get_current_user),
 ):
-    put_query = db.query(models.Account).filter(models.Account.id == id)
-    account = put_query.first()
+    account = await db.get(models.Account, id)
     if account == None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Account was not found"
@@ -77,19 +152,23 @@ def update_account(
     for key in list(updated_data.keys()):
         if updated_data[key] == None:
             updated_data.pop(key)
-    put_query.update(updated_data, synchronize_session=False)
-    db.commit()
-    return put_query.first()
+    for key, value in updated_data.items():
+        setattr(account, key, value)
+    await db.commit()
+    return account
 
 
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_account(
+async def delete_account(
     id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: models.User = Depends(oauth2.get_current_user),
 ):
-    delete_query = db.query(models.Account).filter(models.Account.id == id)
-    account = delete_query.first()
+    # Change counter first, like the transaction writers: any write into this
+    # account has then either committed or waits until we are done, so the
+    # ids read below are complete and cannot go stale
+    await reserve_change_seqs(user.id, 0, db)  # type: ignore
+    account = await db.get(models.Account, id, with_for_update=True)
     if account == None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Account was not found"
@@ -97,6 +176,29 @@ def delete_account(
     if account.user_id != user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
 
-    delete_query.delete(synchronize_session=False)
-    db.commit()
+    # ON DELETE CASCADE drops the account's transactions and its own rollup
+    # rows, but not the other leg of its transfers in counterpart accounts,
+    # and leaves no soft-deleted row for the sync feed to report
+    trans = models.Transaction
+    removed = (
+        await db.execute(
+            select(trans.id, trans.is_deleted).where(
+                or_(trans.from_account_id == id, trans.to_account_id == id)
+            )
+        )
+    ).all()
+    if removed:
+        first_seq = await reserve_change_seqs(user.id, len(removed), db)  # type: ignore
+        await db.execute(
+            insert(models.TransactionTombstone),
+            [
+                {"transaction_id": trans_id, "user_id": user.id, "change_seq": seq}
+                for seq, (trans_id, _) in enumerate(removed, first_seq)
+            ],
+        )
+        live = [trans_id for trans_id, is_deleted in removed if not is_deleted]
+        if live:
+            await db.execute(rollups.apply_transactions_statement(live, -1))
+    await db.execute(delete(models.Account).where(models.Account.id == id))
+    await db.commit()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
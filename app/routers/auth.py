@@ -1,38 +1,60 @@
 from fastapi import Depends, status, HTTPException, APIRouter
 from fastapi.security.oauth2 import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from .. import models, schemas, utils, oauth2
-from ..database import get_db
+from .. import models, schemas, oauth2
+from ..hashing import hasher
+from ..user_cache import CurrentUser, user_cache
+from ..database import get_async_db
+from ..config import settings
+from ..rate_limit import login_rate_limit, rate_limit
 
 
 router = APIRouter(tags=["Authentication"])
 
 
-@router.post("/login", response_model=schemas.TokenWithRefresh)
-def login(
-    login_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+@router.post(
+    "/login",
+    response_model=schemas.TokenWithRefresh,
+    dependencies=[Depends(login_rate_limit(settings.RATE_LIMIT_LOGIN))],
+)
+async def login(
+    login_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    user_data = (
-        db.query(models.User).filter(models.User.login == login_data.username).first()
+    user_data = await db.scalar(
+        select(models.User).where(models.User.login == login_data.username)
     )
     if user_data is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials"
         )
-    if not utils.verify(login_data.password, user_data.password):  # type: ignore
+    valid, new_hash = await hasher.verify_and_update(
+        login_data.password, user_data.password  # type: ignore
+    )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials"
         )
-
-    access_token = oauth2.create_access_token(data={"user_id": user_data.id})
+    # Upgrade hashes made under an older scheme or cost
+    if new_hash is not None:
+        user_data.password = new_hash
+
+    access_token = oauth2.create_access_token(
+        data={
+            "user_id": user_data.id,
+            "token_version": user_data.token_version,
+            "username": user_data.username,
+        }
+    )
 
     refresh_token = oauth2.create_refresh_token(
         data={"user_id": user_data.id, "token_version": user_data.token_version}
     )
 
     user_data.refresh_token = refresh_token
-    db.commit()
+    await db.commit()
 
     return {
         "access_token": access_token,
@@ -41,8 +63,14 @@ def login(
     }
 
 
-@router.post("/refresh", response_model=schemas.TokenWithRefresh)
-def refresh_token(refresh_token: str, db: Session = Depends(get_db)):
+@router.post(
+    "/refresh",
+    response_model=schemas.TokenWithRefresh,
+    dependencies=[Depends(rate_limit("refresh", settings.RATE_LIMIT_REFRESH))],
+)
+async def refresh_token(
+    refresh_token: str, db: AsyncSession = Depends(get_async_db)
+):
     """
     Exchange a valid refresh token for a new access token and refresh token.
     This invalidates the old refresh token (token rotation).
@@ -55,7 +83,7 @@ def refresh_token(refresh_token: str, db: Session = Depends(get_db)):
 
     token_data = oauth2.verify_refresh_token(refresh_token, credentials_exception)
 
-    user = db.query(models.User).filter(models.User.id == token_data.id).first()
+    user = await db.get(models.User, int(token_data.id))  # type: ignore
     if user is None:
         raise credentials_exception
 
@@ -67,13 +95,22 @@ def refresh_token(refresh_token: str, db: Session = Depends(get_db)):
 
     user.token_version += 1
 
-    new_access_token = oauth2.create_access_token(data={"user_id": user.id})
+    new_access_token = oauth2.create_access_token(
+        data={
+            "user_id": user.id,
+            "token_version": user.token_version,
+            "username": user.username,
+        }
+    )
     new_refresh_token = oauth2.create_refresh_token(
         data={"user_id": user.id, "token_version": user.token_version}
     )
 
     user.refresh_token = new_refresh_token
-    db.commit()
+    token_version = user.token_version
+    await db.commit()
+    user_cache.invalidate(int(token_data.id))  # type: ignore
+    oauth2.revoked_versions.revoke(int(token_data.id), token_version)  # type: ignore
 
     return {
         "access_token": new_access_token,
@@ -83,15 +120,20 @@ def refresh_token(refresh_token: str, db: Session = Depends(get_db)):
 
 
 @router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
-def logout(
-    user: models.User = Depends(oauth2.get_current_user), db: Session = Depends(get_db)
+async def logout(
+    current_user: CurrentUser = Depends(oauth2.get_current_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Logout by invalidating the user's refresh token.
     Increments token version to invalidate all tokens.
     """
+    user = await db.get_one(models.User, current_user.id)
     user.refresh_token = None
     user.token_version += 1
-    db.commit()
+    token_version = user.token_version
+    await db.commit()
+    user_cache.invalidate(current_user.id)
+    oauth2.revoked_versions.revoke(current_user.id, token_version)
 
     return None
@@ -3,6 +3,8 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from .. import models, schemas, oauth2
 from ..database import get_db
+from ..replicas import get_read_db
+from ..search import search_condition, search_rank
 
 
 router = APIRouter(prefix="/categories", tags=["Categories"])
@@ -27,7 +29,7 @@ def create_category(
 @router.get("/{id}", response_model=schemas.Category)
 def get_category(
     id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: models.User = Depends(oauth2.get_current_user),
 ):
     category = db.query(models.Category).filter(models.Category.id == id).first()
@@ -43,21 +45,23 @@ def get_category(
 
 @router.get("/", response_model=List[schemas.Category])
 def get_all_categories(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: models.User = Depends(oauth2.get_current_user),
     limit: int = 100,
     search: Optional[str] = "",
 ):
     # Get both user's categories and system categories (user_id is None)
-    categories = (
-        db.query(models.Category)
-        .filter(
-            (models.Category.user_id == user.id) | (models.Category.user_id == None),
-            models.Category.name.contains(search),
-        )
-        .limit(limit)
-        .all()
+    query = db.query(models.Category).filter(
+        (models.Category.user_id == user.id) | (models.Category.user_id == None)
     )
+
+    # Case-insensitive search, best matches first
+    if search:
+        query = query.filter(
+            search_condition(models.Category.name, search)
+        ).order_by(search_rank(models.Category.name, search))
+
+    categories = query.limit(limit).all()
     return categories
 
 
@@ -103,7 +107,8 @@ def delete_category(
     if category.user_id != user.id:  # type: ignore
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
 
-    # Check if category is being used by any transactions
+    # Check if category is being used by any transactions, soft-deleted ones
+    # included: ON DELETE CASCADE would drop them without a sync tombstone
     transactions_using_category = (
         db.query(models.Transaction)
         .filter(models.Transaction.category_id == id)
@@ -0,0 +1,100 @@
+from fastapi import Depends, APIRouter, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from typing import Optional
+from datetime import date, timedelta
+import numpy as np
+from .. import models, schemas, oauth2
+from ..replicas import get_read_db
+
+
+router = APIRouter(prefix="/forecast", tags=["Forecast"])
+
+MAX_HORIZON_DAYS = 3650
+
+
+def recurrence_days(recurrence: Optional[timedelta]):
+    """Step between occurrences in whole days, 0 for one-off reminders"""
+    if recurrence is None:
+        return 0
+    return max(recurrence.days, 1)
+
+
+def expand_occurrences(starts, steps, amounts, today: date, horizon_days: int):
+    """
+    Sum reminder amounts per day over [today, today + horizon_days).
+
+    starts are datetime64[D] first due dates, steps the recurrence in days
+    (0 for one-off) and amounts the value of each occurrence. Occurrences
+    before today are skipped. Everything is array arithmetic, so the cost
+    depends on the number of occurrences, not on Python-level loops.
+    """
+    starts = np.asarray(starts, dtype="datetime64[D]")
+    steps = np.asarray(steps, dtype=np.int64)
+    amounts = np.asarray(amounts, dtype=np.float64)
+    if horizon_days <= 0:
+        return np.zeros(0)
+
+    offsets = (starts - np.datetime64(today, "D")).astype(np.int64)
+    recurring = steps > 0
+    safe_steps = np.where(recurring, steps, 1)
+
+    # Move recurring reminders that started in the past to their next due day
+    skipped = np.where(recurring & (offsets < 0), -(offsets // safe_steps), 0)
+    first = offsets + skipped * safe_steps
+
+    in_range = (first >= 0) & (first < horizon_days)
+    counts = np.where(recurring, (horizon_days - 1 - first) // safe_steps + 1, 1)
+    counts = np.where(in_range, counts, 0)
+
+    owner = np.repeat(np.arange(len(counts)), counts)
+    nth = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    days = first[owner] + nth * steps[owner]
+    return np.bincount(days, weights=amounts[owner], minlength=horizon_days)
+
+
+@router.get("/", response_model=schemas.Forecast)
+def get_forecast(
+    db: Session = Depends(get_read_db),
+    user: models.User = Depends(oauth2.get_current_user),
+    horizon_days: int = Query(90, ge=1, le=MAX_HORIZON_DAYS),
+):
+    """
+    Project the user's total balance day by day, starting today.
+    Every active reminder is treated as a payment on each due day
+    (a negative amount is money coming in).
+    """
+    start_balance = (
+        db.query(func.coalesce(func.sum(models.Account.balance), 0.0))
+        .filter(models.Account.user_id == user.id)
+        .scalar()
+    )
+    reminders = (
+        db.query(
+            models.Reminder.date, models.Reminder.amount, models.Reminder.recurrence
+        )
+        .filter(
+            models.Reminder.user_id == user.id, models.Reminder.is_active == True
+        )
+        .all()
+    )
+
+    today = date.today()
+    scheduled = expand_occurrences(
+        [r.date for r in reminders],
+        [recurrence_days(r.recurrence) for r in reminders],
+        [r.amount for r in reminders],
+        today,
+        horizon_days,
+    )
+    balances = start_balance - np.cumsum(scheduled)
+    dates = np.arange(horizon_days) + np.datetime64(today, "D")
+
+    return schemas.Forecast(
+        start_balance=start_balance,
+        horizon_days=horizon_days,
+        points=[
+            schemas.ForecastPoint(date=d, scheduled=s, balance=b)
+            for d, s, b in zip(dates.tolist(), scheduled.tolist(), balances.tolist())
+        ],
+    )
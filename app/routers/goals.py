@@ -1,8 +1,9 @@
 from fastapi import Depends, Response, status, HTTPException, APIRouter
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, contains_eager, selectinload
 from typing import List, Optional
 from .. import models, schemas, oauth2
 from ..database import get_db
+from ..replicas import get_read_db
 
 
 router = APIRouter(prefix="/goals", tags=["Goals"])
@@ -34,7 +35,7 @@ def create_goal(
 @router.get("/{id}", response_model=schemas.Goal)
 def get_goal(
     id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: models.User = Depends(oauth2.get_current_user),
 ):
     goal = db.query(models.Goal).filter(models.Goal.id == id).first()
@@ -49,17 +50,26 @@ def get_goal(
 
 @router.get("/", response_model=List[schemas.Goal])
 def get_all_goals(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: models.User = Depends(oauth2.get_current_user),
     limit: int = 100,
     completed: Optional[bool] = None,
 ):
-    query = db.query(models.Goal).filter(models.Goal.user_id == user.id)
-    
+    """
+    List goals with their progress. Accounts come in the same joined query
+    the progress is computed from; the owner is loaded with selectinload.
+    """
+    query = (
+        db.query(models.Goal)
+        .join(models.Goal.account)
+        .options(contains_eager(models.Goal.account), selectinload(models.Goal.user))
+        .filter(models.Goal.user_id == user.id)
+    )
+
     if completed is not None:
         query = query.filter(models.Goal.is_completed == completed)
-    
-    goals = query.limit(limit).all()
+
+    goals = query.order_by(models.Goal.id).limit(limit).all()
     return goals
 
 
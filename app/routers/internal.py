@@ -0,0 +1,50 @@
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from .. import replicas
+from ..config import settings
+from ..database import async_engine, engine
+from ..hashing import hasher
+from ..pool_metrics import pool_status
+from ..user_cache import user_cache
+
+
+def require_internal_token(x_internal_token: Optional[str] = Header(None)):
+    """Operators only: the routes are off unless INTERNAL_TOKEN is set"""
+    if not settings.INTERNAL_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if x_internal_token is None or not hmac.compare_digest(
+        x_internal_token.encode(), settings.INTERNAL_TOKEN.encode()
+    ):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
+
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["Internal"],
+    dependencies=[Depends(require_internal_token)],
+)
+
+
+@router.get("/hashing")
+def get_hashing_metrics():
+    """Counters of the password hashing pool, for sizing its workers and queue"""
+    return hasher.metrics()
+
+
+@router.get("/user-cache")
+def get_user_cache_metrics():
+    """Hit/miss counters of the authenticated user cache"""
+    return user_cache.metrics()
+
+
+@router.get("/pool")
+def get_pool_metrics():
+    """Occupancy and checkout waits of this worker's database pools"""
+    return {"sync": pool_status(engine.pool), "async": pool_status(async_engine.pool)}
+
+
+@router.get("/replicas")
+def get_replica_metrics():
+    """Health and read counts of the read replicas"""
+    return replicas.replica_set.metrics()
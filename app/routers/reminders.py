@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from .. import models, schemas, oauth2
 from ..database import get_db
+from ..replicas import get_read_db
 
 
 router = APIRouter(prefix="/reminders", tags=["Reminders"])
@@ -25,7 +26,7 @@ def create_reminder(
 @router.get("/{id}", response_model=schemas.Reminder)
 def get_reminder(
     id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: models.User = Depends(oauth2.get_current_user),
 ):
     reminder = db.query(models.Reminder).filter(models.Reminder.id == id).first()
@@ -40,7 +41,7 @@ def get_reminder(
 
 @router.get("/", response_model=List[schemas.Reminder])
 def get_all_reminders(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: models.User = Depends(oauth2.get_current_user),
     limit: int = 100,
     active: Optional[bool] = None,
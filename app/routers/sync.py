@@ -0,0 +1,86 @@
+from fastapi import Depends, status, HTTPException, APIRouter, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import tuple_
+from typing import Optional
+from .. import models, schemas, oauth2
+from ..replicas import get_read_db
+from .transactions import encode_cursor, decode_cursor
+
+
+router = APIRouter(prefix="/sync", tags=["Sync"])
+
+MAX_SYNC_PAGE_SIZE = 1000
+
+
+@router.get("/transactions", response_model=schemas.TransactionSyncResponse)
+def sync_transactions(
+    db: Session = Depends(get_read_db),
+    user: models.User = Depends(oauth2.get_current_user),
+    cursor: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=MAX_SYNC_PAGE_SIZE),
+):
+    """
+    Return transactions changed after the cursor, oldest change first.
+    Changed rows are returned in full and deleted rows as tombstone ids.
+    Start without a cursor and keep passing next_cursor (it stays null
+    until the first change exists); has_more tells whether another page
+    is already waiting.
+
+    Changes are ordered by change_seq, which writers take under a lock on
+    the user's change counter (see transactions.reserve_change_seqs).
+    Numbers therefore become visible in order: a cursor never skips a change
+    that commits later, even from a long transaction such as an import.
+    Timestamps don't give that guarantee, because they come from transaction
+    start. Transactions removed along with their account are gone from the
+    table; their tombstones come from transaction_tombstones instead.
+    """
+    trans = models.Transaction
+    tomb = models.TransactionTombstone
+    query = db.query(trans).filter(trans.user_id == user.id)
+    gone_query = db.query(tomb).filter(tomb.user_id == user.id)
+
+    if cursor is not None:
+        position = decode_cursor(cursor)
+        try:
+            after = (int(position["seq"]), int(position["id"]))
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+        query = query.filter(tuple_(trans.change_seq, trans.id) > after)
+        gone_query = gone_query.filter(
+            tuple_(tomb.change_seq, tomb.transaction_id) > after
+        )
+
+    changes = query.order_by(trans.change_seq, trans.id).limit(limit + 1).all()
+    gone = (
+        gone_query.order_by(tomb.change_seq, tomb.transaction_id)
+        .limit(limit + 1)
+        .all()
+    )
+    # (seq, id, row or None for a tombstone), merged in feed order
+    entries = sorted(
+        [(t.change_seq, t.id, t) for t in changes]
+        + [(t.change_seq, t.transaction_id, None) for t in gone],
+        key=lambda entry: entry[:2],
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    next_cursor = cursor
+    if entries:
+        seq, id, _ = entries[-1]
+        next_cursor = encode_cursor({"seq": seq, "id": id})
+
+    return schemas.TransactionSyncResponse(
+        items=[
+            schemas.Transaction.model_validate(t)
+            for _, _, t in entries
+            if t is not None and not t.is_deleted
+        ],
+        deleted=[
+            id for _, id, t in entries if t is None or t.is_deleted  # type: ignore
+        ],
+        next_cursor=next_cursor,
+        has_more=has_more,
+    )
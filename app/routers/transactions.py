@@ -1,45 +1,147 @@
 from fastapi import Depends, Response, status, HTTPException, APIRouter, Query
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import desc, asc, and_, func
-from typing import List, Optional
-from datetime import datetime, timezone
-from .. import models, schemas, oauth2
-from ..database import get_db
+from fastapi import File, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy import desc, asc, and_, func, select, update, insert, values, column
+from sqlalchemy import tuple_, any_, bindparam, literal_column
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy import Integer, Float
+from typing import Dict, List, Optional
+from datetime import datetime, timezone, date as Date
+from itertools import islice
+import base64
+import csv
+import io
+import json
+import math
+from .. import models, schemas, oauth2, statements, rollups
+from ..database import get_async_db
+from ..replicas import get_async_read_db, read_only
+from ..search import search_condition, search_rank
 
 
 router = APIRouter(prefix="/transactions", tags=["Transactions"])
 
 
-def update_account_balance(
+MAX_BATCH_SIZE = 10000
+IMPORT_CHUNK_SIZE = 1000
+EXPORT_CHUNK_SIZE = 1000
+MAX_PAGE_SIZE = 500
+MAX_FETCH_IDS = 1000
+EXPORT_FIELDS = [
+    "id",
+    "title",
+    "amount",
+    "category_id",
+    "from_account_id",
+    "to_account_id",
+    "done_at",
+]
+MAX_IMPORT_REJECTS = 1000
+
+
+async def apply_balance_deltas(deltas: Dict[int, float], db: AsyncSession):
+    """Add a per-account delta to each balance in one statement.
+
+    Runs ``UPDATE accounts SET balance = balance + v.delta FROM (VALUES ...) v``
+    inside the caller's DB transaction, so concurrent writes never lose an
+    update. Does not commit. Returns the new balance of every touched account.
+    """
+    deltas = {id: delta for id, delta in deltas.items() if delta}
+    if not deltas:
+        return {}
+
+    delta_values = values(
+        column("account_id", Integer), column("delta", Float), name="deltas"
+    ).data(list(deltas.items()))
+    result = await db.execute(
+        update(models.Account)
+        .where(models.Account.id == delta_values.c.account_id)
+        .values(balance=models.Account.balance + delta_values.c.delta)
+        .returning(models.Account.id, models.Account.balance)
+        .execution_options(synchronize_session=False)
+    )
+    rows = result.all()
+    return {row.id: row.balance for row in rows}
+
+
+def transaction_deltas(
     from_account_id: Optional[int],
     to_account_id: Optional[int],
     amount: float,
-    db: Session,
+    deltas: Optional[Dict[int, float]] = None,
 ):
-    """Update account balance based on transaction."""
-    from_account = (
-        db.query(models.Account).filter(models.Account.id == from_account_id).first()
-    )
-    to_account = (
-        db.query(models.Account).filter(models.Account.id == to_account_id).first()
+    """Accumulate the balance impact of one transaction into a delta map."""
+    deltas = {} if deltas is None else deltas
+    if from_account_id is not None:
+        deltas[from_account_id] = deltas.get(from_account_id, 0.0) - amount
+    if to_account_id is not None:
+        deltas[to_account_id] = deltas.get(to_account_id, 0.0) + amount
+    return deltas
+
+
+async def apply_balance_delta(
+    from_account_id: Optional[int],
+    to_account_id: Optional[int],
+    amount: float,
+    db: AsyncSession,
+):
+    """Move amount between accounts in place, in the caller's DB transaction."""
+    return await apply_balance_deltas(
+        transaction_deltas(from_account_id, to_account_id, amount), db
     )
 
-    if from_account:
-        db.query(models.Account).filter(models.Account.id == from_account.id).update(
-            {"balance": from_account.balance - amount}, synchronize_session=False
+
+async def reserve_change_seqs(user_id: int, count: int, db: AsyncSession):
+    """Reserve count sync-feed numbers for user_id's changes; returns the first.
+
+    The upsert locks the user's change_counters row until commit, so a user's
+    writers take turns and numbers are handed out in commit order: a feed
+    reader can never see a higher number committed before a lower one. A
+    count of 0 only takes the lock.
+
+    Every writer of a user's transactions calls it before locking any
+    transaction, rollup or account row, so those locks are only ever taken
+    by one of the user's writers at a time and cannot deadlock.
+    """
+    counter = models.ChangeCounter
+    last = await db.scalar(
+        pg_insert(counter)
+        .values(user_id=user_id, change_seq=count)
+        .on_conflict_do_update(
+            index_elements=[counter.user_id],
+            set_={"change_seq": counter.change_seq + count},
         )
-    if to_account:
-        db.query(models.Account).filter(models.Account.id == to_account.id).update(
-            {"balance": to_account.balance + amount}, synchronize_session=False
+        .returning(counter.change_seq)
+    )
+    return last - count + 1
+
+
+def encode_cursor(position: dict):
+    """Encode a pagination position as an opaque URL-safe token"""
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Decode a token produced by encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(raw)
+        if not isinstance(position, dict):
+            raise ValueError(cursor)
+        return position
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
         )
-    db.commit()
 
 
-def validate_category_access(category_id: int, user_id: int, db: Session):
+async def validate_category_access(category_id: int, user_id: int, db: AsyncSession):
     """Validate that the user can access the specified category"""
-    category = (
-        db.query(models.Category).filter(models.Category.id == category_id).first()
-    )
+    category = await db.get(models.Category, category_id)
     if not category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Category was not found"
@@ -50,9 +152,9 @@ def validate_category_access(category_id: int, user_id: int, db: Session):
     return category
 
 
-def validate_account_access(account_id: int, user_id: int, db: Session):
+async def validate_account_access(account_id: int, user_id: int, db: AsyncSession):
     """Validate that the user can access the specified account"""
-    account = db.query(models.Account).filter(models.Account.id == account_id).first()
+    account = await db.get(models.Account, account_id)
     if not account:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Account was not found"
@@ -63,12 +165,233 @@ def validate_account_access(account_id: int, user_id: int, db: Session):
     return account
 
 
+async def transaction_filters(
+    db: AsyncSession = Depends(get_async_read_db),
+    user: models.User = Depends(oauth2.get_current_user),
+    search: Optional[str] = None,
+    category_id: Optional[int] = None,
+    from_account_id: Optional[int] = None,
+    to_account_id: Optional[int] = None,
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+):
+    """Build filter conditions for the user's non-deleted transactions"""
+    filters = [
+        models.Transaction.user_id == user.id,
+        models.Transaction.is_deleted == False,
+    ]
+
+    # Case-insensitive text search in title
+    if search:
+        filters.append(search_condition(models.Transaction.title, search))
+
+    # Category filter
+    if category_id is not None:
+        await validate_category_access(category_id, user.id, db)  # type: ignore
+        filters.append(models.Transaction.category_id == category_id)
+
+    # Account filter
+    if from_account_id is not None:
+        await validate_account_access(from_account_id, user.id, db)  # type: ignore
+        filters.append(models.Transaction.from_account_id == from_account_id)
+    if to_account_id is not None:
+        await validate_account_access(to_account_id, user.id, db)  # type: ignore
+        filters.append(models.Transaction.to_account_id == to_account_id)
+
+    # Date range filters
+    if from_date is not None:
+        filters.append(models.Transaction.done_at >= from_date)
+    if to_date is not None:
+        filters.append(models.Transaction.done_at <= to_date)
+
+    # Amount range filters
+    if min_amount is not None:
+        filters.append(models.Transaction.amount >= min_amount)
+    if max_amount is not None:
+        filters.append(models.Transaction.amount <= max_amount)
+
+    return filters
+
+
+async def fetch_transactions(ids: List[int], user_id: int, db: AsyncSession):
+    """Load the user's live transactions among ids with one ANY(array) query"""
+    ids = sorted(set(ids))
+    if len(ids) > MAX_FETCH_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"Cannot fetch more than {MAX_FETCH_IDS} transactions at once",
+        )
+    if not ids:
+        return []
+    result = await db.scalars(
+        select(models.Transaction)
+        .where(
+            models.Transaction.id == any_(bindparam("ids", ids, type_=ARRAY(Integer))),
+            models.Transaction.user_id == user_id,
+            models.Transaction.is_deleted == False,
+        )
+        .order_by(models.Transaction.id)
+    )
+    return result.all()
+
+
+async def validate_transactions_access(
+    items: List[schemas.TransactionCreate], user_id: int, db: AsyncSession
+):
+    """Validate a list of transactions with one query per referenced table.
+
+    Returns the rejected items as a mapping of list index to batch error,
+    applying the same rules and messages as add_transaction.
+    """
+    if not items:
+        return {}
+
+    category_ids = {trans.category_id for trans in items}
+    account_ids = {
+        id
+        for trans in items
+        for id in (trans.from_account_id, trans.to_account_id)
+        if id is not None
+    }
+    category_owners = dict(
+        (
+            await db.execute(
+                select(models.Category.id, models.Category.user_id).where(
+                    models.Category.id.in_(category_ids)
+                )
+            )
+        ).all()
+    )
+    account_owners = (
+        dict(
+            (
+                await db.execute(
+                    select(models.Account.id, models.Account.user_id).where(
+                        models.Account.id.in_(account_ids)
+                    )
+                )
+            ).all()
+        )
+        if account_ids
+        else {}
+    )
+
+    def check(trans: schemas.TransactionCreate):
+        if (
+            not trans.from_account_id
+            and not trans.to_account_id
+            or trans.from_account_id == trans.to_account_id
+        ):
+            return (
+                status.HTTP_422_UNPROCESSABLE_CONTENT,
+                "At least one account (from_account_id or to_account_id) must be specified",
+            )
+        if trans.category_id not in category_owners:
+            return status.HTTP_404_NOT_FOUND, "Category was not found"
+        owner = category_owners[trans.category_id]
+        if owner is not None and owner != user_id:
+            return status.HTTP_403_FORBIDDEN, "Not allowed"
+        for account_id in (trans.from_account_id, trans.to_account_id):
+            if not account_id:
+                continue
+            if account_id not in account_owners:
+                return status.HTTP_404_NOT_FOUND, "Account was not found"
+            if account_owners[account_id] != user_id:
+                return status.HTTP_403_FORBIDDEN, "Not allowed"
+        return None
+
+    errors = {}
+    for index, trans in enumerate(items):
+        error = check(trans)
+        if error is not None:
+            errors[index] = schemas.TransactionBatchError(
+                index=index, status_code=error[0], detail=error[1]
+            )
+    return errors
+
+
+async def bulk_insert_transactions(
+    items: List[schemas.TransactionCreate],
+    user_id: int,
+    deltas: Dict[int, float],
+    db: AsyncSession,
+):
+    """Insert transactions and their rollups in the caller's DB transaction.
+
+    Their balance impact is summed per account into ``deltas`` for the caller
+    to apply once with apply_balance_deltas. Returns new ids in input order.
+    """
+    if not items:
+        return []
+
+    first_seq = await reserve_change_seqs(user_id, len(items), db)
+    rows = []
+    for seq, trans in enumerate(items, first_seq):
+        row = trans.model_dump()
+        if row["done_at"] is None:
+            # Leave the column out so the server default applies
+            row.pop("done_at")
+        row["user_id"] = user_id
+        row["change_seq"] = seq
+        rows.append(row)
+        transaction_deltas(
+            trans.from_account_id, trans.to_account_id, trans.amount, deltas
+        )
+
+    ids = (
+        await db.scalars(
+            insert(models.Transaction).returning(
+                models.Transaction.id, sort_by_parameter_order=True
+            ),
+            rows,
+        )
+    ).all()
+    await db.execute(rollups.apply_transactions_statement(ids, 1))  # type: ignore
+    return list(ids)
+
+
+def statement_row_to_transaction(
+    row: statements.StatementRow, account_id: int, category_id: Optional[int]
+):
+    """Map a parsed statement row onto a transaction of the imported account.
+
+    Negative amounts leave the account, positive amounts arrive to it.
+    """
+    if "error" in row:
+        raise ValueError(row["error"])
+    if "amount" not in row:
+        raise ValueError("Amount is missing")
+    amount = float(row["amount"])  # type: ignore
+    # float() also parses "nan" and "inf", which would poison the balance
+    if not math.isfinite(amount):
+        raise ValueError("Amount must be a finite number")
+    account_field = "from_account_id" if amount < 0 else "to_account_id"
+    return schemas.TransactionCreate(
+        title=row.get("title"),  # type: ignore
+        amount=abs(amount),
+        category_id=row.get("category_id", category_id),  # type: ignore
+        done_at=row.get("done_at"),  # type: ignore
+        **{account_field: account_id},
+    )
+
+
+def describe_row_error(error: Exception):
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(loc) for loc in e['loc'])}: {e['msg']}"
+            for e in error.errors()
+        )
+    return str(error) or "Invalid row"
+
+
 @router.post(
     "/", status_code=status.HTTP_201_CREATED, response_model=schemas.Transaction
 )
-def add_transaction(
+async def add_transaction(
     trans: schemas.TransactionCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: models.User = Depends(oauth2.get_current_user),
 ):
 
@@ -78,121 +401,398 @@ def add_transaction(
             detail="At least one account (from_account_id or to_account_id) must be specified",
         )
 
-    validate_category_access(trans.category_id, user.id, db)  # type: ignore
+    await validate_category_access(trans.category_id, user.id, db)  # type: ignore
     if trans.from_account_id:
-        validate_account_access(trans.from_account_id, user.id, db)  # type: ignore
+        await validate_account_access(trans.from_account_id, user.id, db)  # type: ignore
     if trans.to_account_id:
-        validate_account_access(trans.to_account_id, user.id, db)  # type: ignore
+        await validate_account_access(trans.to_account_id, user.id, db)  # type: ignore
 
     new_trans = models.Transaction(**trans.model_dump())
     new_trans.user_id = user.id
+    new_trans.change_seq = await reserve_change_seqs(user.id, 1, db)  # type: ignore
     db.add(new_trans)
-    db.commit()
-    db.refresh(new_trans)
+    await db.flush()
+
+    # Rollup rows before account rows, in the order every writer uses
+    await db.execute(rollups.apply_transactions_statement([new_trans.id], 1))  # type: ignore
+    await apply_balance_delta(
+        trans.from_account_id, trans.to_account_id, trans.amount, db
+    )
 
-    update_account_balance(trans.from_account_id, trans.to_account_id, trans.amount, db)
+    # Serialize before commit so server defaults fetched by the INSERT are reused
+    result = schemas.Transaction.model_validate(new_trans)
+    await db.commit()
+    return result
 
-    return new_trans
+
+@router.post("/batch", response_model=schemas.TransactionBatchResponse)
+async def add_transactions_batch(
+    items: List[schemas.TransactionCreate],
+    db: AsyncSession = Depends(get_async_db),
+    user: models.User = Depends(oauth2.get_current_user),
+):
+    """Create many transactions at once, reporting rejected items individually."""
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"Batch must not contain more than {MAX_BATCH_SIZE} transactions",
+        )
+
+    errors = await validate_transactions_access(items, user.id, db)  # type: ignore
+    accepted = [index for index in range(len(items)) if index not in errors]
+    deltas: Dict[int, float] = {}
+    ids = await bulk_insert_transactions(
+        [items[index] for index in accepted], user.id, deltas, db  # type: ignore
+    )
+    await apply_balance_deltas(deltas, db)
+    await db.commit()
+
+    return schemas.TransactionBatchResponse(
+        created=[
+            schemas.TransactionBatchItem(index=index, id=id)
+            for index, id in zip(accepted, ids)
+        ],
+        errors=list(errors.values()),
+    )
+
+
+@router.post("/import", response_model=schemas.TransactionImportSummary)
+async def import_transactions(
+    account_id: int,
+    file: UploadFile = File(...),
+    category_id: Optional[int] = None,
+    format: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    user: models.User = Depends(oauth2.get_current_user),
+):
+    """Import a bank statement (CSV, OFX or QIF) into one account.
+
+    The file is parsed lazily and loaded in chunks, so memory use does not
+    depend on the file size. Balance changes are applied once at the end.
+    """
+    if format is None:
+        extension = (file.filename or "").rsplit(".", 1)[-1].lower()
+        format = extension if extension in statements.PARSERS else "csv"
+    parser = statements.PARSERS.get(format.lower())
+    if parser is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail="Unsupported statement format",
+        )
+
+    await validate_account_access(account_id, user.id, db)  # type: ignore
+    if category_id is not None:
+        await validate_category_access(category_id, user.id, db)  # type: ignore
+
+    summary = schemas.TransactionImportSummary(imported=0, rejected=0, rejects=[])
+
+    def reject(line: int, detail: str):
+        summary.rejected += 1
+        if len(summary.rejects) < MAX_IMPORT_REJECTS:
+            summary.rejects.append(
+                schemas.TransactionImportReject(line=line, detail=detail)
+            )
+
+    rows = parser(file.file)
+    deltas: Dict[int, float] = {}
+    while chunk := list(islice(rows, IMPORT_CHUNK_SIZE)):
+        lines, items = [], []
+        for line, row in chunk:
+            try:
+                items.append(statement_row_to_transaction(row, account_id, category_id))
+                lines.append(line)
+            except (ValueError, TypeError) as e:
+                reject(line, describe_row_error(e))
+
+        errors = await validate_transactions_access(items, user.id, db)  # type: ignore
+        for index, error in errors.items():
+            reject(lines[index], error.detail)
+        accepted = [trans for index, trans in enumerate(items) if index not in errors]
+        summary.imported += len(
+            await bulk_insert_transactions(accepted, user.id, deltas, db)  # type: ignore
+        )
+
+    await apply_balance_deltas(deltas, db)
+    await db.commit()
+    return summary
 
 
 @router.get("/updated", response_model=List[int])
-def get_updated_transactions_since(
+async def get_updated_transactions_since(
     updated_since: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     user: models.User = Depends(oauth2.get_current_user),
 ):
     try:
-        updated_since = datetime.fromtimestamp(updated_since)  # type: ignore
-        updated_ids = (
-            db.query(models.Transaction.id)
-            .filter(
-                models.Transaction.user_id == user.id,
-                models.Transaction.updated_at >= updated_since,
-            )
-            .order_by(models.Transaction.updated_at.asc(), models.Transaction.id.asc())
-            .all()
+        since = datetime.fromtimestamp(updated_since, timezone.utc)
+    except (OverflowError, OSError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail="Invalid updated_since timestamp",
         )
-    except Exception as e:
-        import logging
-
-        log = logging.getLogger("uvicorn.error")
-        log.error(e)
-        return []
+    updated_ids = await db.scalars(
+        select(models.Transaction.id)
+        .where(
+            models.Transaction.user_id == user.id,
+            models.Transaction.updated_at >= since,
+        )
+        .order_by(models.Transaction.updated_at.asc(), models.Transaction.id.asc())
+    )
 
-    return [row[0] for row in updated_ids]
+    return updated_ids.all()
 
 
 @router.get("/filter", response_model=List[int])
-def get_transactions_by_filter(
-    db: Session = Depends(get_db),
-    user: models.User = Depends(oauth2.get_current_user),
+async def get_transactions_by_filter(
+    db: AsyncSession = Depends(get_async_read_db),
+    filters: list = Depends(transaction_filters),
     search: Optional[str] = None,
-    category_id: Optional[int] = None,
-    from_account_id: Optional[int] = None,
-    to_account_id: Optional[int] = None,
-    from_date: Optional[datetime] = None,
-    to_date: Optional[datetime] = None,
-    min_amount: Optional[float] = None,
-    max_amount: Optional[float] = None,
 ):
-    # Build filter conditions
-    filters = [models.Transaction.user_id == user.id]
-
-    # Text search in title
+    # Get transaction IDs matching filters, best title matches first
+    query = select(models.Transaction.id).where(and_(*filters))
     if search:
-        filters.append(models.Transaction.title.contains(search))
+        query = query.order_by(search_rank(models.Transaction.title, search))
+    transaction_ids = await db.scalars(query.order_by(models.Transaction.id))
 
-    # Category filter
+    return transaction_ids.all()
+
+
+@router.get("/export")
+async def export_transactions(
+    db: AsyncSession = Depends(get_async_read_db),
+    filters: list = Depends(transaction_filters),
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+):
+    """Stream every matching transaction as CSV or NDJSON.
+
+    Rows are read through a server-side cursor in EXPORT_CHUNK_SIZE batches,
+    so the full result set is never held in memory.
+    """
+    columns = [getattr(models.Transaction, name) for name in EXPORT_FIELDS]
+    result = await db.stream(
+        select(*columns)
+        .where(and_(*filters))
+        .order_by(models.Transaction.id)
+        .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    )
+
+    async def stream():
+        try:
+            if format == "csv":
+                yield ",".join(EXPORT_FIELDS) + "\r\n"
+            async for chunk in result.partitions():
+                buffer = io.StringIO()
+                if format == "csv":
+                    csv.writer(buffer).writerows(chunk)
+                else:
+                    for row in chunk:
+                        record = dict(zip(EXPORT_FIELDS, row))
+                        record["done_at"] = record["done_at"].isoformat()
+                        buffer.write(json.dumps(record) + "\n")
+                yield buffer.getvalue()
+        finally:
+            await result.close()
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        stream(),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="transactions.{format}"'
+        },
+    )
+
+
+@router.get("/summary", response_model=List[schemas.TransactionSummary])
+async def get_transactions_summary(
+    db: AsyncSession = Depends(get_async_read_db),
+    filters: list = Depends(transaction_filters),
+    bucket: str = Query("month", pattern="^(day|week|month|year)$"),
+):
+    """
+    Totals per category and time bucket, aggregated by the database.
+    Transactions into an account count as income, out of an account as
+    expense, and between two accounts as transfer.
+    """
+    trans = models.Transaction
+    # bucket is validated against a fixed list, so it is safe to inline
+    period = func.date_trunc(literal_column(f"'{bucket}'"), trans.done_at)
+    is_income = and_(trans.from_account_id == None, trans.to_account_id != None)
+    is_expense = and_(trans.from_account_id != None, trans.to_account_id == None)
+    is_transfer = and_(trans.from_account_id != None, trans.to_account_id != None)
+
+    def total(condition):
+        return func.coalesce(func.sum(trans.amount).filter(condition), 0.0)
+
+    result = await db.execute(
+        select(
+            period.label("period"),
+            trans.category_id,
+            total(is_income).label("income"),
+            total(is_expense).label("expense"),
+            total(is_transfer).label("transfer"),
+            func.count().label("count"),
+        )
+        .where(and_(*filters))
+        .group_by(period, trans.category_id)
+        .order_by(period, trans.category_id)
+    )
+    rows = result.all()
+    return [schemas.TransactionSummary.model_validate(row) for row in rows]
+
+
+@router.get("/monthly", response_model=List[schemas.MonthlyRollup])
+async def get_monthly_rollups(
+    db: AsyncSession = Depends(get_async_read_db),
+    user: models.User = Depends(oauth2.get_current_user),
+    from_month: Optional[Date] = None,
+    to_month: Optional[Date] = None,
+    category_id: Optional[int] = None,
+    account_id: Optional[int] = None,
+):
+    """Monthly inflow/outflow totals per category and account, read from rollups"""
+    rollup = models.MonthlyRollup
+    query = select(rollup).where(rollup.user_id == user.id, rollup.count != 0)
+    if from_month is not None:
+        query = query.where(rollup.month >= from_month.replace(day=1))
+    if to_month is not None:
+        query = query.where(rollup.month <= to_month)
     if category_id is not None:
-        validate_category_access(category_id, user.id, db)  # type: ignore
-        filters.append(models.Transaction.category_id == category_id)
+        query = query.where(rollup.category_id == category_id)
+    if account_id is not None:
+        query = query.where(rollup.account_id == account_id)
+    result = await db.scalars(
+        query.order_by(rollup.month, rollup.category_id, rollup.account_id)
+    )
+    return result.all()
 
-    # Account filter
-    if from_account_id is not None:
-        validate_account_access(from_account_id, user.id, db)  # type: ignore
-        filters.append(models.Transaction.from_account_id == from_account_id)
-    if to_account_id is not None:
-        validate_account_access(to_account_id, user.id, db)  # type: ignore
-        filters.append(models.Transaction.to_account_id == to_account_id)
 
-    # Date range filters
-    if from_date is not None:
-        filters.append(models.Transaction.done_at >= from_date)
-    if to_date is not None:
-        filters.append(models.Transaction.done_at <= to_date)
+@router.get("/batch", response_model=List[schemas.Transaction])
+async def get_transactions_batch(
+    ids: List[int] = Query(...),
+    db: AsyncSession = Depends(get_async_read_db),
+    user: models.User = Depends(oauth2.get_current_user),
+):
+    """Fetch several transactions by id in a single query.
 
-    # Amount range filters
-    if min_amount is not None:
-        filters.append(models.Transaction.amount >= min_amount)
-    if max_amount is not None:
-        filters.append(models.Transaction.amount <= max_amount)
+    Ids that do not exist, are deleted or belong to another user are skipped.
+    """
+    return await fetch_transactions(ids, user.id, db)  # type: ignore
 
-    # Get transaction IDs matching filters
-    transaction_ids = (
-        db.query(models.Transaction.id)
-        .filter(and_(*filters))
-        .filter(models.Transaction.is_deleted == False)
-        .order_by(models.Transaction.id)
-        .all()
+
+@router.post("/batch/fetch", response_model=List[schemas.Transaction])
+@read_only
+async def fetch_transactions_batch(
+    body: schemas.TransactionIds,
+    db: AsyncSession = Depends(get_async_read_db),
+    user: models.User = Depends(oauth2.get_current_user),
+):
+    """Same as GET /transactions/batch for id lists too long for a URL"""
+    return await fetch_transactions(body.ids, user.id, db)  # type: ignore
+
+
+@router.get("/page", response_model=schemas.TransactionCursorResponse)
+async def get_transactions_page(
+    db: AsyncSession = Depends(get_async_read_db),
+    user: models.User = Depends(oauth2.get_current_user),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort_by: str = Query("done_at", pattern="^(id|title|amount|done_at)$"),
+    sort_order: str = Query("desc", pattern="^(asc|desc)$"),
+    include_total: bool = False,
+):
+    """Keyset-paginated transaction list.
+
+    Pages are addressed by an opaque cursor over (sort column, id) instead of
+    an offset, so every page costs the same. Pass the returned next_cursor
+    with the same sort parameters to get the following page.
+    """
+    conditions = [
+        models.Transaction.user_id == user.id,
+        models.Transaction.is_deleted == False,
+    ]
+    sort_column = getattr(models.Transaction, sort_by)
+    order = desc if sort_order == "desc" else asc
+
+    query = select(models.Transaction).where(*conditions)
+    if cursor is not None:
+        position = decode_cursor(cursor)
+        try:
+            if position.get("sort") != [sort_by, sort_order]:
+                raise ValueError(cursor)
+            value = position["value"]
+            # The value goes into a comparison with the sort column, so it
+            # must have the column's type or Postgres rejects the query
+            if sort_by == "done_at":
+                value = datetime.fromisoformat(value)
+            elif sort_by == "amount":
+                value = float(value)
+                if not math.isfinite(value):
+                    raise ValueError(cursor)
+            elif sort_by == "id":
+                value = int(value)
+            elif not isinstance(value, str):
+                raise TypeError(cursor)
+            after = (value, int(position["id"]))
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+        key = tuple_(sort_column, models.Transaction.id)
+        query = query.where(key < after if sort_order == "desc" else key > after)
+
+    result = await db.scalars(
+        query.order_by(order(sort_column), order(models.Transaction.id)).limit(
+            limit + 1
+        )
     )
+    trans = result.all()
+    has_next = len(trans) > limit
+    trans = trans[:limit]
+
+    next_cursor = None
+    if has_next:
+        last = trans[-1]
+        value = getattr(last, sort_by)
+        next_cursor = encode_cursor(
+            {
+                "sort": [sort_by, sort_order],
+                "value": value.isoformat() if sort_by == "done_at" else value,
+                "id": last.id,
+            }
+        )
 
-    return [row[0] for row in transaction_ids]
+    total = None
+    if include_total:
+        total = await db.scalar(
+            select(func.count()).select_from(models.Transaction).where(*conditions)
+        )
+    pagination = schemas.CursorPaginationInfo(
+        limit=limit,
+        has_next=has_next,
+        next_cursor=next_cursor,
+        total=total,
+    )
+    return schemas.TransactionCursorResponse(
+        items=[schemas.Transaction.model_validate(t) for t in trans],
+        pagination=pagination,
+    )
 
 
 @router.get("/{id}", response_model=schemas.Transaction)
-def get_transaction(
+async def get_transaction(
     id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     user: models.User = Depends(oauth2.get_current_user),
 ):
-    trans = (
-        db.query(models.Transaction)
-        # .options(
+    trans = await db.get(
+        models.Transaction,
+        id,
+        # options=[
         #     joinedload(models.Transaction.category),
         #     joinedload(models.Transaction.user),
         #     joinedload(models.Transaction.account),
-        # )
-        .filter(models.Transaction.id == id).first()
+        # ],
     )
     if trans == None or trans.is_deleted:  # type: ignore
         raise HTTPException(
@@ -204,8 +804,8 @@ def get_transaction(
 
 
 @router.get("/", response_model=schemas.TransactionListResponse)
-def get_all_transactions(
-    db: Session = Depends(get_db),
+async def get_all_transactions(
+    db: AsyncSession = Depends(get_async_read_db),
     user: models.User = Depends(oauth2.get_current_user),
     limit: int = 50,
     offset: int = 0,
@@ -213,15 +813,19 @@ def get_all_transactions(
     sort_order: str = Query("desc", pattern="^(asc|desc)$"),
 ):
     # Build base query with user filter
-    base_query = db.query(models.Transaction).filter(
-        models.Transaction.user_id == user.id
-    )
+    conditions = [
+        models.Transaction.user_id == user.id,
+        models.Transaction.is_deleted == False,
+    ]
+    base_query = select(models.Transaction).where(*conditions)
 
     # Get total count for pagination
-    total = base_query.count()
+    total = await db.scalar(
+        select(func.count()).select_from(models.Transaction).where(*conditions)
+    )
 
     # Build query with joins for data retrieval
-    query = base_query.filter(models.Transaction.is_deleted == False)
+    query = base_query
     # query = base_query.options(
     #     joinedload(models.Transaction.category),
     #     joinedload(models.Transaction.user),
@@ -236,14 +840,14 @@ def get_all_transactions(
         query = query.order_by(asc(sort_column))
 
     # Apply pagination
-    trans = query.offset(offset).limit(limit).all()
+    trans = (await db.scalars(query.offset(offset).limit(limit))).all()
 
     # Create pagination info
     pagination = schemas.PaginationInfo(
         total=total,
         limit=limit,
         offset=offset,
-        has_next=offset + limit < total,
+        has_next=offset + limit < total,  # type: ignore
     )
 
     return schemas.TransactionListResponse(
@@ -253,14 +857,15 @@ def get_all_transactions(
 
 
 @router.put("/{id}", response_model=schemas.Transaction)
-def update_transaction(
+async def update_transaction(
     id: int,
     updated_trans: schemas.TransactionUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: models.User = Depends(oauth2.get_current_user),
 ):
-    put_query = db.query(models.Transaction).filter(models.Transaction.id == id)
-    trans = put_query.first()
+    change_seq = await reserve_change_seqs(user.id, 1, db)  # type: ignore
+    # Lock the row so concurrent amount changes apply their deltas in order
+    trans = await db.get(models.Transaction, id, with_for_update=True)
     if trans == None or trans.is_deleted:  # type: ignore
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Transaction was not found"
@@ -273,65 +878,71 @@ def update_transaction(
 
     # If category_id is being updated, validate access
     if updated_trans.category_id is not None:
-        validate_category_access(updated_trans.category_id, user.id, db)  # type: ignore
+        await validate_category_access(updated_trans.category_id, user.id, db)  # type: ignore
 
     updated_data = updated_trans.model_dump()
     for key in list(updated_data.keys()):
         if updated_data[key] == None:
             updated_data.pop(key)
     updated_data["updated_at"] = datetime.now(timezone.utc)
+    updated_data["change_seq"] = change_seq
 
-    new_amount = updated_trans.amount is not None and updated_trans.amount != old_amount
+    # Category and amount are part of the monthly rollups
+    rollup_changed = any(
+        key in updated_data and updated_data[key] != getattr(trans, key)
+        for key in ("amount", "category_id")
+    )
+    if rollup_changed:
+        await db.execute(rollups.apply_transactions_statement([id], -1))
+
+    for key, value in updated_data.items():
+        setattr(trans, key, value)
+    await db.flush()
+
+    if rollup_changed:
+        await db.execute(rollups.apply_transactions_statement([id], 1))
 
-    if new_amount:
-        # Remove old transaction impact from old account
-        update_account_balance(
+    if updated_trans.amount is not None and updated_trans.amount != old_amount:
+        # Apply only the difference to the accounts already affected
+        await apply_balance_delta(
             trans.from_account_id,  # type: ignore
             trans.to_account_id,  # type: ignore
-            new_amount - old_amount,
+            updated_trans.amount - old_amount,
             db,
         )
 
-    put_query.update(updated_data, synchronize_session=False)  # type: ignore
-    db.commit()
-
-    # Return updated transaction with relationships
-    return (
-        db.query(models.Transaction)
-        # .options(
-        #     joinedload(models.Transaction.category),
-        #     joinedload(models.Transaction.user),
-        #     joinedload(models.Transaction.account),
-        # )
-        .filter(models.Transaction.id == id).first()
-    )
+    result = schemas.Transaction.model_validate(trans)
+    await db.commit()
+    return result
 
 
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_transaction(
+async def delete_transaction(
     id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: models.User = Depends(oauth2.get_current_user),
 ):
-    delete_query = db.query(models.Transaction).filter(models.Transaction.id == id)
-    trans = delete_query.first()
-    if trans == None:
+    change_seq = await reserve_change_seqs(user.id, 1, db)  # type: ignore
+    trans = await db.get(models.Transaction, id, with_for_update=True)
+    # A soft-deleted transaction must not be reverted twice
+    if trans == None or trans.is_deleted:  # type: ignore
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Transaction was not found"
         )
     if trans.user_id != user.id:  # type: ignore
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
 
-    update_account_balance(
+    await db.execute(rollups.apply_transactions_statement([id], -1))
+    trans.is_deleted = True  # type: ignore
+    trans.updated_at = datetime.now(timezone.utc)  # type: ignore
+    trans.change_seq = change_seq  # type: ignore
+    await db.flush()
+
+    await apply_balance_delta(
         trans.from_account_id,  # type: ignore
         trans.to_account_id,  # type: ignore
         -trans.amount,  # type: ignore
         db,
     )
-
-    delete_query.update(
-        {"is_deleted": True, "updated_at": datetime.now(timezone.utc)},
-        synchronize_session=False,
-    )
-    db.commit()
+    await db.commit()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,23 +1,36 @@
 from fastapi import Depends, Response, status, HTTPException, APIRouter
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
-from .. import models, schemas, utils, oauth2
-from ..database import get_db
+from .. import models, schemas, oauth2
+from ..hashing import hasher
+from ..user_cache import user_cache
+from ..database import get_async_db, get_db
+from ..config import settings
+from ..rate_limit import rate_limit
 
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
 @router.get("/me", response_model=schemas.User)
-def get_current_user(user: models.User = Depends(oauth2.get_current_user)):
+def get_current_user(user: models.User = Depends(oauth2.get_current_user_record)):
     return user
 
 
-@router.post("/", status_code=status.HTTP_201_CREATED, response_model=schemas.User)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+@router.post(
+    "/",
+    status_code=status.HTTP_201_CREATED,
+    response_model=schemas.User,
+    dependencies=[Depends(rate_limit("create_user", settings.RATE_LIMIT_CREATE_USER))],
+)
+async def create_user(
+    user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)
+):
     # Check if user with this login already exists
-    existing_user = (
-        db.query(models.User).filter(models.User.login == user.login).first()
+    existing_user = await db.scalar(
+        select(models.User).where(models.User.login == user.login)
     )
     if existing_user:
         raise HTTPException(
@@ -31,11 +44,11 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
             detail="Password must be at least 8 characters long",
         )
 
-    user.password = utils.hash(user.password)
+    user.password = await hasher.hash(user.password)
     new_user = models.User(**user.model_dump())
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
 
@@ -56,22 +69,26 @@ def get_all_users(db: Session = Depends(get_db)):
 
 
 @router.put("/", response_model=schemas.User)
-def update_user(
+async def update_user(
     updated_user: schemas.UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: models.User = Depends(oauth2.get_current_user),
 ):
     if updated_user.password is not None:
-        updated_user.password = utils.hash(updated_user.password)
-    put_query = db.query(models.User).filter(models.User.id == user.id)
-    user = put_query.first()
+        updated_user.password = await hasher.hash(updated_user.password)
     updated_data = updated_user.model_dump()
     for i in list(updated_data.keys()):
         if updated_data[i] == None:
             updated_data.pop(i)
-    put_query.update(updated_data, synchronize_session=False)  # type: ignore
-    db.commit()
-    return put_query.first()
+    if updated_data:
+        await db.execute(
+            update(models.User)
+            .where(models.User.id == user.id)
+            .values(**updated_data)
+        )
+    await db.commit()
+    user_cache.invalidate(user.id)  # type: ignore
+    return await db.get(models.User, user.id)
 
 
 @router.delete("/", status_code=status.HTTP_204_NO_CONTENT)
@@ -81,4 +98,6 @@ def delete_user(
     delete_query = db.query(models.User).filter(models.User.id == user.id)
     delete_query.delete(synchronize_session=False)
     db.commit()
+    user_cache.invalidate(user.id)
+    oauth2.revoked_versions.revoke(user.id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, FiniteFloat
 from typing import Optional, List, Generic, TypeVar
 from datetime import datetime, date as Date, timedelta
 
@@ -74,9 +74,25 @@ class Account(AccountBase):
     created_at: datetime
 
 
+class BalancePoint(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    period: datetime
+    inflow: float
+    outflow: float
+    balance: float
+
+
+class AccountHistory(BaseModel):
+    account_id: int
+    bucket: str
+    points: List[BalancePoint]
+
+
 class TransactionBase(BaseModel):
     title: str
-    amount: float
+    # JSON bodies may carry NaN and Infinity, which would poison balances
+    amount: FiniteFloat
     category_id: int
     from_account_id: Optional[int] = None
     to_account_id: Optional[int] = None
@@ -88,7 +104,7 @@ class TransactionCreate(TransactionBase):
 
 class TransactionUpdate(BaseModel):
     title: Optional[str] = None
-    amount: Optional[float] = None
+    amount: Optional[FiniteFloat] = None
     category_id: Optional[int] = None
 
 
@@ -99,6 +115,10 @@ class Transaction(TransactionBase):
     done_at: datetime
 
 
+class TransactionIds(BaseModel):
+    ids: List[int]
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -113,6 +133,7 @@ class TokenWithRefresh(BaseModel):
 class TokenData(BaseModel):
     id: Optional[str] = None
     token_version: Optional[int] = None
+    username: Optional[str] = None
 
 
 class GoalBase(BaseModel):
@@ -141,6 +162,9 @@ class Goal(GoalBase):
     created_at: datetime
     user: User
     account: Account
+    current_amount: float
+    progress_ratio: float
+    days_remaining: int
 
 
 class ReminderBase(BaseModel):
@@ -187,3 +211,83 @@ class PaginatedResponse(BaseModel, Generic[T]):
 class TransactionListResponse(BaseModel):
     items: List[Transaction]
     pagination: PaginationInfo
+
+
+class CursorPaginationInfo(BaseModel):
+    limit: int
+    has_next: bool
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+
+class TransactionCursorResponse(BaseModel):
+    items: List[Transaction]
+    pagination: CursorPaginationInfo
+
+
+class TransactionBatchItem(BaseModel):
+    index: int
+    id: int
+
+
+class TransactionBatchError(BaseModel):
+    index: int
+    status_code: int
+    detail: str
+
+
+class TransactionBatchResponse(BaseModel):
+    created: List[TransactionBatchItem]
+    errors: List[TransactionBatchError]
+
+
+class TransactionImportReject(BaseModel):
+    line: int
+    detail: str
+
+
+class TransactionImportSummary(BaseModel):
+    imported: int
+    rejected: int
+    rejects: List[TransactionImportReject]
+
+
+class TransactionSyncResponse(BaseModel):
+    items: List[Transaction]
+    deleted: List[int]
+    next_cursor: Optional[str] = None
+    has_more: bool
+
+
+class MonthlyRollup(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    month: Date
+    category_id: int
+    account_id: int
+    inflow: float
+    outflow: float
+    count: int
+
+
+class TransactionSummary(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    period: datetime
+    category_id: int
+    income: float
+    expense: float
+    transfer: float
+    count: int
+
+
+class ForecastPoint(BaseModel):
+    date: Date
+    scheduled: float
+    balance: float
+
+
+class Forecast(BaseModel):
+    start_balance: float
+    horizon_days: int
+    points: List[ForecastPoint]
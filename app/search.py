@@ -0,0 +1,15 @@
+from sqlalchemy import func
+
+
+def _escape_like(value: str):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_condition(column, search: str):
+    """Case-insensitive substring match, served by the column's pg_trgm GIN index"""
+    return column.ilike(f"%{_escape_like(search)}%", escape="\\")
+
+
+def search_rank(column, search: str):
+    """Ordering expression putting the closest trigram matches first"""
+    return func.word_similarity(search, column).desc()
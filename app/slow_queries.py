@@ -0,0 +1,186 @@
+"""
+Slow-query log.
+
+Statements slower than SLOW_QUERY_THRESHOLD_MS (0 turns the log off) are
+written as JSON lines to SLOW_QUERY_LOG_PATH. The file is rotated at
+SLOW_QUERY_LOG_MAX_BYTES and SLOW_QUERY_LOG_BACKUPS old files are kept.
+Each record holds:
+- the statement and its bound parameters, with strings and anything under
+  a password/token/secret key redacted (string literals in plans too)
+- the route and user of the request that ran it
+
+A SLOW_QUERY_EXPLAIN_SAMPLE_RATE share of the slow SELECTs is also re-run
+as EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) on a side connection. The side
+connection is outside the request's transaction, so the plan can differ
+slightly from the original run. ANALYZE executes the statement again: a
+sampled request pays for the slow query twice. Statements that write or
+lock rows (SELECT ... FOR UPDATE) are never explained.
+"""
+
+import json
+import logging
+import random
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from logging.handlers import RotatingFileHandler
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from .config import settings
+from .oauth2 import user_id_from_scope
+from .query_stats import current_queries
+
+logger = logging.getLogger(__name__)
+
+SENSITIVE_KEYS = ("password", "token", "secret")
+EXPLAIN_PREFIX = "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) "
+# Writes in CTEs and row locks (FOR UPDATE/NO KEY UPDATE/SHARE/KEY SHARE)
+WRITES = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE|SHARE)\b")
+# Plans show bound values inline, e.g. Filter: (title = 'rent'::text)
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+
+
+def redact(value, key: str = ""):
+    """Bound parameters with only numbers, dates and flags left readable"""
+    if isinstance(value, dict):
+        return {k: redact(v, str(k)) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(v, key) for v in value]
+    if any(word in key.lower() for word in SENSITIVE_KEYS):
+        return "***"
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (date, datetime, timedelta)):
+        return str(value)
+    return "***"
+
+
+def redact_plan(plan):
+    """EXPLAIN output with string literals masked like redact() masks strings"""
+    if isinstance(plan, dict):
+        return {k: redact_plan(v) for k, v in plan.items()}
+    if isinstance(plan, list):
+        return [redact_plan(v) for v in plan]
+    if isinstance(plan, str):
+        return STRING_LITERAL.sub("'***'", plan)
+    return plan
+
+
+def explainable(statement: str):
+    """Plain reads only: ANALYZE really runs the statement"""
+    statement = statement.lstrip().upper()
+    return statement.startswith(("SELECT", "WITH")) and not WRITES.search(statement)
+
+
+class SlowQueryLog:
+    def __init__(self, path: str, max_bytes: int, backups: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._handler = None
+        self._explain_engines = {}
+        self._lock = threading.Lock()
+
+    def _get_handler(self):
+        with self._lock:
+            if self._handler is None:
+                self._handler = RotatingFileHandler(
+                    self.path,
+                    maxBytes=self.max_bytes,
+                    backupCount=self.backups,
+                    encoding="utf-8",
+                    delay=True,
+                )
+            return self._handler
+
+    def write(self, record: dict):
+        line = json.dumps(record, default=str)
+        self._get_handler().handle(logging.makeLogRecord({"msg": line}))
+
+    def _explain_engine(self, engine: Engine):
+        # A connection of its own: the request's connection is mid-transaction,
+        # and the pool may have none to spare
+        key = (engine.url, engine.dialect.is_async)
+        with self._lock:
+            if key not in self._explain_engines:
+                if engine.dialect.is_async:
+                    self._explain_engines[key] = create_async_engine(
+                        engine.url, poolclass=NullPool
+                    ).sync_engine
+                else:
+                    self._explain_engines[key] = create_engine(
+                        engine.url, poolclass=NullPool
+                    )
+            return self._explain_engines[key]
+
+    def explain(self, engine: Engine, statement: str, parameters):
+        """Plan of statement as a JSON-ready object, or an error description"""
+        try:
+            with self._explain_engine(engine).connect() as conn:
+                plan = conn.exec_driver_sql(EXPLAIN_PREFIX + statement, parameters)
+                return {"plan": redact_plan(plan.scalar())}
+        except Exception as error:
+            return {"explain_error": f"{type(error).__name__}: {error}"}
+
+    def close(self):
+        with self._lock:
+            handler, self._handler = self._handler, None
+            engines, self._explain_engines = self._explain_engines, {}
+        if handler is not None:
+            handler.close()
+        for engine in engines.values():
+            engine.dispose()
+
+
+slow_query_log = SlowQueryLog(
+    path=settings.SLOW_QUERY_LOG_PATH,
+    max_bytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+    backups=settings.SLOW_QUERY_LOG_BACKUPS,
+)
+
+
+def _request_context():
+    queries = current_queries()
+    scope = queries.scope if queries is not None else None
+    if scope is None:
+        return {"route": None, "user_id": None}
+    route = scope.get("route")
+    path = getattr(route, "path", scope["path"])
+    return {"route": f"{scope['method']} {path}", "user_id": user_id_from_scope(scope)}
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if settings.SLOW_QUERY_THRESHOLD_MS > 0:
+        context._slow_query_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_slow_query_started", None)
+    if started is None or statement.startswith(EXPLAIN_PREFIX):
+        return
+    duration_ms = 1000 * (time.perf_counter() - started)
+    if duration_ms < settings.SLOW_QUERY_THRESHOLD_MS:
+        return
+
+    record = {
+        "ts": datetime.now(timezone.utc).isoformat(),
+        "duration_ms": round(duration_ms, 3),
+        **_request_context(),
+        "statement": " ".join(statement.split()),
+        "parameters": redact(parameters),
+    }
+    if (
+        not executemany
+        and explainable(statement)
+        and random.random() < settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE
+    ):
+        record.update(slow_query_log.explain(conn.engine, statement, parameters))
+    try:
+        slow_query_log.write(record)
+    except OSError:
+        logger.exception("Could not write the slow-query log")
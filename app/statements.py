@@ -0,0 +1,129 @@
+import csv
+import io
+import re
+from datetime import datetime
+from typing import BinaryIO, Callable, Dict, Iterator, Tuple
+
+# A parser lazily yields (line number, row) pairs. A row maps "title",
+# "amount" (signed: negative is money leaving the account), "done_at" and
+# optionally "category_id" to raw values, or holds an "error" message.
+StatementRow = Dict[str, object]
+StatementParser = Callable[[BinaryIO], Iterator[Tuple[int, StatementRow]]]
+
+PARSERS: Dict[str, StatementParser] = {}
+
+CSV_COLUMNS = {
+    "title": ("title", "description", "payee", "name", "memo"),
+    "amount": ("amount", "sum"),
+    "done_at": ("done_at", "date", "posted", "booking_date"),
+    "category_id": ("category_id",),
+}
+
+
+def register_parser(name: str):
+    """Register a statement parser under a format name"""
+
+    def decorator(parser: StatementParser):
+        PARSERS[name] = parser
+        return parser
+
+    return decorator
+
+
+def _text_lines(file: BinaryIO):
+    return io.TextIOWrapper(file, encoding="utf-8-sig", errors="replace", newline="")
+
+
+@register_parser("csv")
+def parse_csv(file: BinaryIO):
+    reader = csv.reader(_text_lines(file))
+    header = next(reader, None)
+    if header is None:
+        return
+    header = [name.strip().lower() for name in header]
+
+    columns = {}
+    for field, aliases in CSV_COLUMNS.items():
+        for alias in aliases:
+            if alias in header:
+                columns[field] = header.index(alias)
+                break
+
+    for record in reader:
+        if not any(value.strip() for value in record):
+            continue
+        row: StatementRow = {
+            field: record[index].strip()
+            for field, index in columns.items()
+            if index < len(record) and record[index].strip()
+        }
+        yield reader.line_num, row
+
+
+def _parse_ofx_date(value: str):
+    # YYYYMMDD[HHMM[SS[.XXX]]][[offset:TZ]]
+    digits = value.split("[")[0].split(".")[0]
+    formats = {8: "%Y%m%d", 12: "%Y%m%d%H%M", 14: "%Y%m%d%H%M%S"}
+    if len(digits) not in formats:
+        raise ValueError(value)
+    return datetime.strptime(digits, formats[len(digits)])
+
+
+@register_parser("ofx")
+def parse_ofx(file: BinaryIO):
+    tag = re.compile(r"<(/?)([A-Z0-9.]+)>([^<\r\n]*)", re.IGNORECASE)
+    row: StatementRow = {}
+    start = 0
+    inside = False
+    for line_num, line in enumerate(_text_lines(file), start=1):
+        for closing, name, value in tag.findall(line):
+            name = name.upper()
+            value = value.strip()
+            if name == "STMTTRN":
+                if closing:
+                    yield start, row
+                    inside = False
+                else:
+                    row, start, inside = {}, line_num, True
+            elif inside and not closing and value:
+                try:
+                    if name == "TRNAMT":
+                        row["amount"] = value
+                    elif name == "DTPOSTED":
+                        row["done_at"] = _parse_ofx_date(value)
+                    elif name == "NAME" or (name == "MEMO" and "title" not in row):
+                        row["title"] = value
+                except ValueError:
+                    row["error"] = f"Invalid {name} value"
+
+
+@register_parser("qif")
+def parse_qif(file: BinaryIO):
+    row: StatementRow = {}
+    start = 0
+    for line_num, line in enumerate(_text_lines(file), start=1):
+        line = line.strip()
+        if not line or line.startswith("!"):
+            continue
+        if not row:
+            start = line_num
+        code, value = line[0], line[1:].strip()
+        if code == "^":
+            yield start, row
+            row = {}
+        elif code == "D":
+            value = value.replace("'", "/").replace(" ", "")
+            for fmt in ("%m/%d/%Y", "%m/%d/%y", "%Y-%m-%d"):
+                try:
+                    row["done_at"] = datetime.strptime(value, fmt)
+                    break
+                except ValueError:
+                    continue
+            else:
+                row["error"] = "Invalid date value"
+        elif code in ("T", "U"):
+            row["amount"] = value.replace(",", "")
+        elif code == "P" or (code == "M" and "title" not in row):
+            row["title"] = value
+    if row:
+        yield start, row
@@ -0,0 +1,91 @@
+"""
+In-process cache of authenticated users.
+
+get_current_user runs on nearly every request; this keeps a slim, immutable
+snapshot of the user per (user_id, token_version) so repeated requests with
+the same token skip the users lookup. Entries expire after
+USER_CACHE_TTL_SECONDS and the least recently used ones are evicted beyond
+USER_CACHE_SIZE. Writers that change or remove a user call invalidate(); in
+a multi-process deployment other workers catch up when the TTL runs out.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+from .config import settings
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    id: int
+    username: str
+    login: str
+    token_version: int
+    created_at: datetime
+
+
+class UserCache:
+    def __init__(self, size: int, ttl: float):
+        self.size = size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, user_id: int, token_version: Optional[int]):
+        key = (user_id, token_version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def put(self, token_version: Optional[int], user: CurrentUser):
+        if self.size <= 0:
+            return
+        with self._lock:
+            key = (user.id, token_version)
+            self._entries[key] = (time.monotonic() + self.ttl, user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, user_id: int):
+        """Drop every cached token version of a user"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+                self._invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.size,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
+
+
+user_cache = UserCache(
+    size=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS
+)
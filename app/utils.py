@@ -1,7 +1,46 @@
 from passlib.context import CryptContext
+from passlib.exc import MissingBackendError
+from .config import settings
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+def make_context(
+    scheme: str = settings.PASSWORD_HASH_SCHEME,
+    bcrypt_rounds: int = settings.BCRYPT_ROUNDS,
+    argon2_memory_cost: int = settings.ARGON2_MEMORY_COST,
+    argon2_time_cost: int = settings.ARGON2_TIME_COST,
+    argon2_parallelism: int = settings.ARGON2_PARALLELISM,
+):
+    """
+    Hash with scheme at the given cost; the other scheme is still accepted
+    so existing hashes keep verifying until they are upgraded. argon2
+    needs the argon2-cffi package.
+    """
+    return CryptContext(
+        schemes=["bcrypt", "argon2"],
+        default=scheme,
+        deprecated="auto",
+        bcrypt__rounds=bcrypt_rounds,
+        argon2__type="ID",
+        argon2__memory_cost=argon2_memory_cost,
+        argon2__time_cost=argon2_time_cost,
+        argon2__parallelism=argon2_parallelism,
+    )
+
+
+pwd_context = make_context()
+
+
+def check_backend(context: CryptContext):
+    """
+    Fail at startup rather than on the first login when the default scheme
+    cannot hash here, e.g. argon2 without the argon2 extra installed.
+    """
+    try:
+        context.handler().get_backend()
+    except MissingBackendError as error:
+        raise RuntimeError(
+            f"PASSWORD_HASH_SCHEME={context.default_scheme()} is not usable: {error}"
+        ) from error
 
 
 def hash(password: str):
@@ -10,3 +49,11 @@ def hash(password: str):
 
 def verify(password: str, hashed_password: str) -> bool:
     return pwd_context.verify(password, hashed_password)
+
+
+def verify_and_update(password: str, hashed_password: str):
+    """Verify, and return a new hash when the stored one uses an outdated policy"""
+    valid = pwd_context.verify(password, hashed_password)
+    if valid and pwd_context.needs_update(hashed_password):
+        return True, pwd_context.hash(password)
+    return valid, None
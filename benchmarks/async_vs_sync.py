@@ -0,0 +1,104 @@
+"""
+Sync (psycopg2 + worker threads) vs async (asyncpg + event loop) database
+stacks under many concurrent clients.
+
+    python -m benchmarks.async_vs_sync [--clients 1000] [--requests 5]
+                                       [--pool-size 50] [--latency-ms 5]
+
+Each client issues --requests sequential "requests" that read a page of
+transactions, padded with pg_sleep(--latency-ms) to stand in for a busier
+database. Sync requests run on AnyIO's default thread limiter (40 tokens),
+exactly like a sync FastAPI route; async requests run on the event loop.
+Both engines get the same --pool-size so only the concurrency model
+differs. Needs the same environment variables as the app (see
+app/config.py) and a migrated database.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import anyio.to_thread
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app import models
+from app.database import ASYNC_DB_URL, DB_URL
+
+
+def page_query():
+    return (
+        select(models.Transaction.id, models.Transaction.amount)
+        .where(models.Transaction.user_id == 1, models.Transaction.is_deleted == False)
+        .order_by(models.Transaction.done_at.desc(), models.Transaction.id.desc())
+        .limit(50)
+    )
+
+
+async def run_clients(request, clients: int, requests: int):
+    latencies = []
+
+    async def client():
+        for _ in range(requests):
+            started = time.perf_counter()
+            await request()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return time.perf_counter() - started, latencies
+
+
+def report(name: str, elapsed: float, latencies):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(
+        f"{name:<6} {len(latencies) / elapsed:10.1f} req/s"
+        f"   p50 {p50:8.1f} ms   p99 {p99:8.1f} ms"
+    )
+
+
+async def main_async(args):
+    sleep = text("SELECT pg_sleep(:seconds)").bindparams(seconds=args.latency_ms / 1000)
+    query = page_query()
+
+    sync_engine = create_engine(DB_URL, pool_size=args.pool_size, max_overflow=0)
+    async_engine = create_async_engine(
+        ASYNC_DB_URL, pool_size=args.pool_size, max_overflow=0
+    )
+
+    def sync_request_body():
+        with sync_engine.connect() as conn:
+            conn.execute(sleep)
+            conn.execute(query).all()
+
+    async def sync_request():
+        await anyio.to_thread.run_sync(sync_request_body)
+
+    async def async_request():
+        async with async_engine.connect() as conn:
+            await conn.execute(sleep)
+            (await conn.execute(query)).all()
+
+    try:
+        for name, request in (("sync", sync_request), ("async", async_request)):
+            await run_clients(request, args.pool_size, 1)  # warm the pool
+            elapsed, latencies = await run_clients(request, args.clients, args.requests)
+            report(name, elapsed, latencies)
+    finally:
+        sync_engine.dispose()
+        await async_engine.dispose()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.async_vs_sync")
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=5)
+    parser.add_argument("--pool-size", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    args = parser.parse_args(argv)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
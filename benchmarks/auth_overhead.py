@@ -0,0 +1,48 @@
+"""
+Per-request cost of access token verification, with and without the
+verified-token cache.
+
+    python -m benchmarks.auth_overhead [--number N]
+
+Needs the same environment variables as the app (see app/config.py).
+"""
+
+import argparse
+import timeit
+from app import oauth2
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.auth_overhead")
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    token = oauth2.create_access_token(
+        data={"user_id": 1, "token_version": 0, "username": "bench"}
+    )
+    exc = Exception("invalid token")
+
+    def uncached():
+        oauth2.verified_tokens.clear()
+        oauth2.verify_access_token(token, exc)
+
+    def cached():
+        oauth2.verify_access_token(token, exc)
+
+    def clear_only():
+        oauth2.verified_tokens.clear()
+
+    def measure(func):
+        return min(timeit.repeat(func, number=args.number, repeat=5))
+
+    oauth2.verify_access_token(token, exc)
+    results = {
+        "jwt.decode + TokenData": measure(uncached) - measure(clear_only),
+        "verified-token cache hit": measure(cached),
+    }
+    for name, seconds in results.items():
+        print(f"{name:<26} {seconds / args.number * 1e6:8.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Cost of expanding recurring reminders into a daily forecast.
+
+    python -m benchmarks.forecast [--reminders N] [--horizon DAYS] [--number N]
+
+Compares app.routers.forecast.expand_occurrences with a plain Python loop
+over the same random reminders. Needs the same environment variables as the
+app (see app/config.py).
+"""
+
+import argparse
+import timeit
+from datetime import date
+import numpy as np
+from app.routers.forecast import expand_occurrences
+
+
+def expand_loop(starts, steps, amounts, today, horizon_days):
+    daily = np.zeros(horizon_days)
+    for start, step, amount in zip(starts, steps, amounts):
+        offset = int((start - np.datetime64(today, "D")).astype(int))
+        due = range(offset, horizon_days, int(step)) if step else [offset]
+        for day in due:
+            if 0 <= day < horizon_days:
+                daily[day] += amount
+    return daily
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.forecast")
+    parser.add_argument("--reminders", type=int, default=500)
+    parser.add_argument("--horizon", type=int, default=3650)
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    today = date(2026, 1, 1)
+    starts = np.datetime64(today, "D") + rng.integers(-400, 400, args.reminders)
+    steps = rng.integers(0, 90, args.reminders)
+    amounts = rng.uniform(1, 100, args.reminders)
+
+    print(f"{args.reminders} reminders over {args.horizon} days")
+    for name, expand in (("numpy", expand_occurrences), ("loop", expand_loop)):
+        seconds = timeit.timeit(
+            lambda: expand(starts, steps, amounts, today, args.horizon),
+            number=args.number,
+        )
+        print(f"{name:<8} {1000 * seconds / args.number:10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
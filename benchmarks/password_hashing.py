@@ -0,0 +1,86 @@
+"""
+Latency and throughput of password hashing per hash policy.
+
+    python -m benchmarks.password_hashing [--samples N] [--workers N]
+
+Latency is one hash at a time in this process; throughput runs the same
+work on a process pool the size of PASSWORD_HASH_WORKERS (or --workers),
+the way app.hashing does. argon2 rows are skipped without argon2-cffi.
+Needs the same environment variables as the app (see app/config.py).
+"""
+
+import argparse
+import functools
+import importlib.util
+import multiprocessing
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from app import utils
+from app.config import settings
+
+
+BCRYPT = [{"scheme": "bcrypt", "bcrypt_rounds": rounds} for rounds in (10, 11, 12, 13)]
+ARGON2 = [
+    {
+        "scheme": "argon2",
+        "argon2_memory_cost": memory,
+        "argon2_time_cost": time_cost,
+        "argon2_parallelism": 1,
+    }
+    for memory, time_cost in ((19456, 2), (47104, 1), (65536, 3))
+]
+
+
+@functools.lru_cache
+def _context(options):
+    return utils.make_context(**dict(options))
+
+
+def _hash(options, password):
+    return _context(options).hash(password)
+
+
+def describe(config):
+    return ", ".join(f"{key}={value}" for key, value in config.items())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.password_hashing")
+    parser.add_argument("--samples", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=settings.PASSWORD_HASH_WORKERS)
+    args = parser.parse_args(argv)
+
+    configs = list(BCRYPT)
+    if importlib.util.find_spec("argon2") is not None:
+        configs += ARGON2
+
+    print(f"{'policy':<84} {'p50 ms':>8} {'p95 ms':>8} {'hash/s':>8}")
+    with ProcessPoolExecutor(
+        max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        for config in configs:
+            options = tuple(sorted(config.items()))
+            _hash(options, "warm up")
+
+            latencies = []
+            for _ in range(args.samples):
+                started = time.perf_counter()
+                _hash(options, "correct horse battery staple")
+                latencies.append((time.perf_counter() - started) * 1000)
+
+            jobs = args.samples * args.workers
+            list(pool.map(_hash, [options] * args.workers, ["warm up"] * args.workers))
+            started = time.perf_counter()
+            list(pool.map(_hash, [options] * jobs, ["correct horse"] * jobs))
+            throughput = jobs / (time.perf_counter() - started)
+
+            p95 = statistics.quantiles(latencies, n=20)[-1]
+            print(
+                f"{describe(config):<84} {statistics.median(latencies):8.1f}"
+                f" {p95:8.1f} {throughput:8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,40 @@
 from app.config import settings
-from app.database import Base, get_db
+from app.database import Base, get_db, get_async_db
 from app.main import app
 from app.models import Transaction, Category, Account, Goal, Reminder
-from app.oauth2 import create_access_token
+from app.oauth2 import create_access_token, revoked_versions
+from app.user_cache import user_cache
+from app.rate_limit import limiter
+from app.replicas import recent_writes
 from fastapi.testclient import TestClient
 import pytest
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import NullPool
 from urllib.parse import quote_plus
 from datetime import date, timedelta
+import re
 
 
 DB_URL = f"postgresql+psycopg2://{quote_plus(settings.DB_USERNAME)}:{quote_plus(settings.DB_PASSWORD)}@{settings.DB_HOSTNAME}:{settings.DB_PORT}/{settings.DB_NAME}_test"
 engine = create_engine(DB_URL)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# TestClient runs each request on a fresh event loop, so connections can't be pooled
+async_engine = create_async_engine(
+    DB_URL.replace("+psycopg2", "+asyncpg"), poolclass=NullPool
+)
+TestingAsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
+
+def query_count(response):
+    """Number of SQL statements a request ran, from its Server-Timing header"""
+    timing = response.headers["server-timing"]
+    match = re.search(r'db;dur=[\d.]+;desc="(\d+) queries"', timing)
+    assert match, timing
+    return int(match.group(1))
 
 
 @pytest.fixture
@@ -29,6 +50,11 @@ def db_session():
 def client():
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    # Ids are reused once the tables are recreated
+    user_cache.clear()
+    revoked_versions.clear()
+    limiter.backend.clear()
+    recent_writes.clear()
 
     def override_get_db():
         db: Session = TestingSessionLocal()
@@ -37,7 +63,12 @@ def client():
         finally:
             db.close()
 
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     yield TestClient(app)
 
 
@@ -81,6 +112,12 @@ def logged_client(client, token):
     return client
 
 
+@pytest.fixture
+def internal_headers(monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_TOKEN", "test-internal-token")
+    return {"X-Internal-Token": "test-internal-token"}
+
+
 @pytest.fixture
 def test_categories(test_users, db_session):
     data = [
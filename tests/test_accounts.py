@@ -116,6 +116,22 @@ class TestGetAllAccounts:
         for account in accounts:
             assert "Checking" in account["name"]
 
+    def test_get_all_accounts_search_case_insensitive(
+        self, logged_client, test_accounts
+    ):
+        res = logged_client.get("/accounts/?search=checking")
+        assert res.status_code == 200
+        accounts = res.json()
+        assert [account["name"] for account in accounts] == ["Checking Account"]
+
+    def test_get_all_accounts_search_ranks_best_match_first(
+        self, logged_client, test_accounts
+    ):
+        res = logged_client.get("/accounts/?search=savings acc")
+        assert res.status_code == 200
+        accounts = res.json()
+        assert accounts[0]["name"] == "Savings Account"
+
     def test_get_all_accounts_with_limit(self, logged_client, test_accounts):
         res = logged_client.get("/accounts/?limit=1")
         assert res.status_code == 200
@@ -280,3 +296,76 @@ class TestDeleteAccount:
         res = logged_client.delete("/accounts/999999")
         assert res.status_code == 404
         assert res.json().get("detail") == "Account was not found"
+
+
+class TestAccountHistory:
+    def test_get_account_history(self, logged_client, test_accounts, test_categories):
+        checking, savings = test_accounts[0].id, test_accounts[1].id
+        batch = [
+            {
+                "title": "Salary",
+                "amount": 500.0,
+                "category_id": test_categories[0].id,
+                "to_account_id": checking,
+                "done_at": "2024-01-05T10:00:00+00:00",
+            },
+            {
+                "title": "Rent",
+                "amount": 300.0,
+                "category_id": test_categories[1].id,
+                "from_account_id": checking,
+                "done_at": "2024-02-01T10:00:00+00:00",
+            },
+            {
+                "title": "To savings",
+                "amount": 100.0,
+                "category_id": test_categories[1].id,
+                "from_account_id": checking,
+                "to_account_id": savings,
+                "done_at": "2024-02-20T10:00:00+00:00",
+            },
+            {
+                "title": "Food",
+                "amount": 50.0,
+                "category_id": test_categories[1].id,
+                "from_account_id": checking,
+                "done_at": "2024-04-02T10:00:00+00:00",
+            },
+        ]
+        res = logged_client.post("/transactions/batch", json=batch)
+        assert res.status_code == 200
+        current = logged_client.get(f"/accounts/{checking}").json()["balance"]
+
+        res = logged_client.get(f"/accounts/{checking}/history?bucket=month")
+        assert res.status_code == 200
+        history = schemas.AccountHistory(**res.json())
+        points = [
+            (p.period.month, p.inflow, p.outflow, p.balance) for p in history.points
+        ]
+        assert points == [
+            (1, 500.0, 0.0, current + 50.0 + 400.0),
+            (2, 0.0, 400.0, current + 50.0),
+            (4, 0.0, 50.0, current),
+        ]
+
+        res = logged_client.get(
+            f"/accounts/{checking}/history",
+            params={
+                "bucket": "month",
+                "from": "2024-02-10T00:00:00+00:00",
+                "to": "2024-03-01T00:00:00+00:00",
+            },
+        )
+        assert res.status_code == 200
+        points = res.json()["points"]
+        assert len(points) == 1
+        assert points[0]["balance"] == current + 50.0
+
+    def test_get_account_history_not_allowed(self, logged_client, test_accounts):
+        other_account = next(acc for acc in test_accounts if acc.user_id != 1)
+        res = logged_client.get(f"/accounts/{other_account.id}/history")
+        assert res.status_code == 403
+
+    def test_get_account_history_not_found(self, logged_client, test_accounts):
+        res = logged_client.get("/accounts/999999/history")
+        assert res.status_code == 404
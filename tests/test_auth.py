@@ -194,6 +194,17 @@ def test_logout_invalidates_refresh_token(client, test_user, logged_client):
     assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
 
+def test_logout_rejects_access_token(client, test_user):
+    """Test that an access token stops working after logout"""
+    headers = login_headers(client, test_user)
+    assert client.get("/accounts/", headers=headers).status_code == 200
+
+    assert client.post("/logout", headers=headers).status_code == 204
+
+    assert client.get("/accounts/", headers=headers).status_code == 401
+    assert client.get("/users/me", headers=headers).status_code == 401
+
+
 def test_logout_increments_token_version(client, test_user, logged_client, db_session):
     """Test that logout increments token version"""
     user = (
@@ -304,3 +315,130 @@ def test_refresh_token_updates_in_database_after_refresh(client, test_user, db_s
     )
     assert user.refresh_token == new_refresh_token
     assert user.refresh_token != old_refresh_token
+
+
+@pytest.fixture
+def stateless(monkeypatch):
+    monkeypatch.setattr(oauth2, "STATELESS_ACCESS_TOKENS", True)
+
+
+def login_headers(client, test_user):
+    res = client.post(
+        "/login",
+        data={"username": test_user["login"], "password": test_user["password"]},
+    )
+    assert res.status_code == 200
+    return {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+
+def test_access_token_carries_claims(client, test_user):
+    headers = login_headers(client, test_user)
+    payload = jwt.decode(
+        headers["Authorization"].split()[1],
+        settings.SECRET_KEY,
+        algorithms=settings.ALGORITHM,
+    )
+    assert payload["user_id"] == test_user["id"]
+    assert payload["token_version"] == 0
+    assert payload["username"] == test_user["username"]
+
+
+def test_stateless_skips_user_lookup(stateless, client, test_user, db_session):
+    headers = login_headers(client, test_user)
+    db_session.query(models.User).filter(models.User.id == test_user["id"]).delete()
+    db_session.commit()
+
+    # Claims are trusted, the deleted row is not noticed...
+    assert client.get("/accounts/", headers=headers).status_code == 200
+    # ...unless the route needs the full user record
+    assert client.get("/users/me", headers=headers).status_code == 401
+
+
+def test_stateless_logout_revokes(stateless, client, test_user):
+    headers = login_headers(client, test_user)
+    assert client.get("/accounts/", headers=headers).status_code == 200
+
+    assert client.post("/logout", headers=headers).status_code == 204
+    assert client.get("/accounts/", headers=headers).status_code == 401
+
+    # Logging in again issues a token with the new version
+    headers = login_headers(client, test_user)
+    assert client.get("/accounts/", headers=headers).status_code == 200
+
+
+def test_stateless_delete_user_revokes(stateless, client, test_user):
+    headers = login_headers(client, test_user)
+    assert client.delete("/users/", headers=headers).status_code == 204
+    assert client.get("/accounts/", headers=headers).status_code == 401
+
+
+def test_stateless_old_tokens_fall_back(stateless, logged_client, test_user):
+    # Tokens without token_version/username claims are checked against the DB
+    res = logged_client.get("/accounts/")
+    assert res.status_code == 200
+
+
+def test_verified_token_cache_skips_decode(monkeypatch):
+    oauth2.verified_tokens.clear()
+    token = oauth2.create_access_token(data={"user_id": 1})
+    calls = []
+    decode = jwt.decode
+    monkeypatch.setattr(
+        oauth2.jwt, "decode", lambda *a, **kw: calls.append(1) or decode(*a, **kw)
+    )
+    exc = Exception("invalid")
+
+    first = oauth2.verify_access_token(token, exc)
+    second = oauth2.verify_access_token(token, exc)
+    assert first is second
+    assert first.id == "1"
+    assert len(calls) == 1
+
+
+def test_verified_token_cache_respects_expiry(monkeypatch):
+    oauth2.verified_tokens.clear()
+    token = oauth2.create_access_token(data={"user_id": 1})
+    exc = ValueError("invalid")
+    oauth2.verify_access_token(token, exc)
+
+    calls = []
+    decode = jwt.decode
+    monkeypatch.setattr(
+        oauth2.jwt, "decode", lambda *a, **kw: calls.append(1) or decode(*a, **kw)
+    )
+    later = time.time() + oauth2.ACCESS_TOKEN_EXPIRE_MINUTES * 60 + 1
+    monkeypatch.setattr(oauth2.time, "time", lambda: later)
+
+    # Past exp the cached entry is dropped and the token decoded again
+    oauth2.verify_access_token(token, exc)
+    assert len(calls) == 1
+
+
+def test_verified_token_cache_cleared_on_key_rotation(monkeypatch):
+    oauth2.verified_tokens.clear()
+    token = oauth2.create_access_token(data={"user_id": 1})
+    exc = ValueError("invalid")
+    oauth2.verify_access_token(token, exc)
+
+    monkeypatch.setattr(oauth2, "SECRET_KEY", "rotated_" + settings.SECRET_KEY)
+    with pytest.raises(ValueError):
+        oauth2.verify_access_token(token, exc)
+
+
+@pytest.mark.parametrize("mode", ["database", "stateless"])
+def test_refresh_ends_other_devices_access_tokens(mode, client, test_user, monkeypatch):
+    """A refresh bumps token_version, which all of the user's devices share"""
+    monkeypatch.setattr(oauth2, "STATELESS_ACCESS_TOKENS", mode == "stateless")
+    other_device = login_headers(client, test_user)
+    res = client.post(
+        "/login",
+        data={"username": test_user["login"], "password": test_user["password"]},
+    )
+    refresh_token = res.json()["refresh_token"]
+
+    res = client.post(f"/refresh?refresh_token={refresh_token}")
+    assert res.status_code == 200
+    this_device = {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+    assert client.get("/accounts/", headers=this_device).status_code == 200
+    assert client.get("/accounts/", headers=other_device).status_code == 401
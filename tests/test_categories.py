@@ -104,6 +104,14 @@ class TestGetAllCategories:
         for category in categories:
             assert "Income" in category["name"]
 
+    def test_get_all_categories_search_case_insensitive(
+        self, logged_client, test_categories
+    ):
+        res = logged_client.get("/categories/?search=gEnEr")
+        assert res.status_code == 200
+        categories = res.json()
+        assert [category["name"] for category in categories] == ["General"]
+
     def test_get_all_categories_with_limit(self, logged_client, test_categories):
         res = logged_client.get("/categories/?limit=1")
         assert res.status_code == 200
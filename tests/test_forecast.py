@@ -0,0 +1,98 @@
+from datetime import date, timedelta
+import numpy as np
+from app import schemas
+from app.routers.forecast import expand_occurrences
+
+
+def test_expand_occurrences():
+    today = date(2026, 1, 1)
+    daily = expand_occurrences(
+        [
+            np.datetime64("2025-12-22"),  # every 7 days, started in the past
+            np.datetime64("2026-01-03"),  # one-off inside the horizon
+            np.datetime64("2025-12-30"),  # one-off in the past
+            np.datetime64("2026-02-01"),  # starts after the horizon
+        ],
+        [7, 0, 0, 1],
+        [10.0, 5.0, 99.0, 99.0],
+        today,
+        20,
+    )
+    expected = np.zeros(20)
+    expected[[4, 11, 18]] += 10.0
+    expected[2] += 5.0
+    assert np.array_equal(daily, expected)
+
+
+def test_expand_occurrences_empty():
+    daily = expand_occurrences([], [], [], date(2026, 1, 1), 5)
+    assert np.array_equal(daily, np.zeros(5))
+
+
+def expand_occurrences_loop(starts, steps, amounts, today, horizon_days):
+    """Reference implementation: one Python iteration per occurrence"""
+    daily = np.zeros(horizon_days)
+    for start, step, amount in zip(starts, steps, amounts):
+        offset = int((start - np.datetime64(today, "D")).astype(int))
+        due = range(offset, horizon_days, int(step)) if step else [offset]
+        for day in due:
+            if 0 <= day < horizon_days:
+                daily[day] += amount
+    return daily
+
+
+def test_expand_occurrences_many_reminders():
+    # Timing lives in benchmarks/forecast.py
+    rng = np.random.default_rng(0)
+    count = 500
+    today = date(2026, 1, 1)
+    starts = np.datetime64(today, "D") + rng.integers(-400, 400, count)
+    steps = rng.integers(0, 90, count)
+    amounts = rng.uniform(1, 100, count)
+
+    daily = expand_occurrences(starts, steps, amounts, today, 3650)
+    assert daily.shape == (3650,)
+    assert np.allclose(
+        daily, expand_occurrences_loop(starts, steps, amounts, today, 3650)
+    )
+
+
+def test_get_forecast(logged_client, test_accounts, test_reminders):
+    res = logged_client.get("/forecast/", params={"horizon_days": 65})
+    assert res.status_code == 200
+    forecast = schemas.Forecast(**res.json())
+
+    today = date.today()
+    assert forecast.start_balance == 6000.0
+    assert forecast.horizon_days == 65
+    assert len(forecast.points) == 65
+    assert forecast.points[0].date == today
+    assert forecast.points[-1].date == today + timedelta(days=64)
+
+    scheduled = {p.date: p.scheduled for p in forecast.points if p.scheduled}
+    assert scheduled == {
+        today + timedelta(days=7): 150.0,
+        today + timedelta(days=30): 1200.0,
+        today + timedelta(days=60): 1200.0,
+    }
+    assert forecast.points[6].balance == 6000.0
+    assert forecast.points[7].balance == 5850.0
+    assert forecast.points[-1].balance == 6000.0 - 150.0 - 2400.0
+
+
+def test_get_forecast_no_data(logged_client, test_user):
+    res = logged_client.get("/forecast/", params={"horizon_days": 3})
+    assert res.status_code == 200
+    forecast = schemas.Forecast(**res.json())
+    assert forecast.start_balance == 0
+    assert [p.balance for p in forecast.points] == [0, 0, 0]
+
+
+def test_get_forecast_invalid_horizon(logged_client):
+    res = logged_client.get("/forecast/", params={"horizon_days": 0})
+    assert res.status_code == 422
+
+
+def test_get_forecast_unauthorized(client):
+    res = client.get("/forecast/")
+    assert res.status_code == 401
@@ -2,6 +2,8 @@ from app import schemas
 from app import models
 import pytest
 from datetime import date, timedelta
+from sqlalchemy import event
+from .conftest import engine
 
 
 class TestCreateGoal:
@@ -193,6 +195,48 @@ class TestGetAllGoals:
             goal_obj = schemas.Goal(**goal)
             assert goal_obj.user_id == 1
 
+    def test_get_all_goals_progress(self, logged_client, test_goals, test_accounts):
+        res = logged_client.get("/goals/")
+        assert res.status_code == 200
+        goals = {g["id"]: schemas.Goal(**g) for g in res.json()}
+
+        goal = goals[test_goals[0].id]
+        assert goal.current_amount == test_accounts[0].balance
+        assert goal.progress_ratio == test_accounts[0].balance / goal.target_amount
+        assert goal.days_remaining == 365
+
+    def test_get_all_goals_query_count(
+        self, logged_client, test_user, test_accounts, db_session
+    ):
+        db_session.add_all(
+            [
+                models.Goal(
+                    user_id=test_user["id"],
+                    account_id=test_accounts[i % 2].id,
+                    target_amount=1000.0 + i,
+                    deadline=date.today() + timedelta(days=i),
+                )
+                for i in range(100)
+            ]
+        )
+        db_session.commit()
+
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            res = logged_client.get("/goals/", params={"limit": 100})
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+
+        assert res.status_code == 200
+        assert len(res.json()) == 100
+        # Current user lookup, goals joined with accounts, goal owners
+        assert len(statements) <= 3, statements
+
     def test_get_all_goals_with_completed_filter(self, logged_client, test_goals):
         # Filter for completed goals only
         res = logged_client.get("/goals/?completed=true")
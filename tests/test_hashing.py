@@ -0,0 +1,117 @@
+import asyncio
+from fastapi import HTTPException
+from passlib.exc import MissingBackendError
+import pytest
+from app import models, utils
+from app.hashing import PasswordHasher
+
+
+@pytest.fixture
+def pool():
+    hasher = PasswordHasher(workers=1, queue_size=1)
+    yield hasher
+    hasher.shutdown()
+
+
+def test_hash_and_verify(pool):
+    async def roundtrip():
+        hashed = await pool.hash("test_password")
+        return (
+            hashed,
+            await pool.verify("test_password", hashed),
+            await pool.verify("wrong_password", hashed),
+        )
+
+    hashed, valid, invalid = asyncio.run(roundtrip())
+    assert utils.verify("test_password", hashed)
+    assert valid is True
+    assert invalid is False
+
+    metrics = pool.metrics()
+    assert metrics["submitted"] == 3
+    assert metrics["completed"] == 3
+    assert metrics["in_flight"] == 0
+    assert metrics["rejected"] == 0
+    assert metrics["avg_run_ms"] > 0
+
+
+def test_rejects_beyond_queue(pool):
+    async def burst():
+        return await asyncio.gather(
+            *(pool.hash("test_password") for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(burst())
+    rejected = [r for r in results if isinstance(r, HTTPException)]
+    assert len(rejected) == 1
+    assert rejected[0].status_code == 503
+    assert rejected[0].headers == {"Retry-After": "1"}
+
+    metrics = pool.metrics()
+    assert metrics["rejected"] == 1
+    assert metrics["completed"] == 2
+    assert metrics["peak_in_flight"] == 2
+
+
+def test_hashing_metrics_endpoint(client, test_user, internal_headers):
+    res = client.get("/internal/hashing", headers=internal_headers)
+    assert res.status_code == 200
+    assert res.json()["completed"] >= 1
+
+
+def test_verify_and_update_upgrades_cost(monkeypatch):
+    old_hash = utils.make_context(bcrypt_rounds=10).hash("test_password")
+    current = utils.make_context(bcrypt_rounds=11)
+    monkeypatch.setattr(utils, "pwd_context", current)
+
+    valid, new_hash = utils.verify_and_update("test_password", old_hash)
+    assert valid is True
+    assert new_hash.startswith("$2b$11$")
+    assert utils.verify_and_update("test_password", new_hash) == (True, None)
+    assert utils.verify_and_update("wrong_password", old_hash) == (False, None)
+
+
+def test_verify_and_update_upgrades_scheme(monkeypatch):
+    pytest.importorskip("argon2")
+    old_hash = utils.make_context(bcrypt_rounds=4).hash("test_password")
+    current = utils.make_context(
+        scheme="argon2",
+        argon2_memory_cost=1024,
+        argon2_time_cost=1,
+        argon2_parallelism=1,
+    )
+    monkeypatch.setattr(utils, "pwd_context", current)
+
+    valid, new_hash = utils.verify_and_update("test_password", old_hash)
+    assert valid is True
+    assert new_hash.startswith("$argon2id$")
+
+
+def test_check_backend(monkeypatch):
+    utils.check_backend(utils.make_context(bcrypt_rounds=4))
+
+    context = utils.make_context(scheme="argon2")
+    handler = context.handler()
+
+    def missing():
+        raise MissingBackendError("argon2: no backends available")
+
+    monkeypatch.setattr(handler, "get_backend", missing)
+    with pytest.raises(RuntimeError, match="PASSWORD_HASH_SCHEME=argon2"):
+        utils.check_backend(context)
+
+
+def test_login_rehashes_outdated_password(client, test_user, db_session):
+    user = db_session.query(models.User).filter(models.User.id == test_user["id"]).one()
+    user.password = utils.make_context(bcrypt_rounds=4).hash(test_user["password"])
+    db_session.commit()
+
+    res = client.post(
+        "/login",
+        data={"username": test_user["login"], "password": test_user["password"]},
+    )
+    assert res.status_code == 200
+
+    db_session.refresh(user)
+    assert user.password.startswith("$2b$12$")
+    assert utils.verify(test_user["password"], user.password)
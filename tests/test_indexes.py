@@ -0,0 +1,51 @@
+from sqlalchemy import text
+import pytest
+
+
+# Query shapes issued by the routers and the index each one should use.
+# Sequential scans are disabled because the test tables are tiny.
+@pytest.mark.parametrize(
+    "query, index",
+    [
+        (
+            "SELECT * FROM transactions WHERE user_id = 1 AND is_deleted = false "
+            "ORDER BY done_at DESC, id DESC LIMIT 50",
+            "ix_transactions_user_id_done_at",
+        ),
+        (
+            "SELECT id FROM transactions WHERE user_id = 1 AND updated_at >= now() "
+            "ORDER BY updated_at, id",
+            "ix_transactions_user_id_updated_at",
+        ),
+        (
+            "SELECT * FROM transactions WHERE category_id = 1 LIMIT 1",
+            "ix_transactions_category_id",
+        ),
+        (
+            "SELECT id FROM transactions WHERE from_account_id = 1",
+            "ix_transactions_from_account_id",
+        ),
+        (
+            "SELECT id FROM transactions WHERE to_account_id = 1",
+            "ix_transactions_to_account_id",
+        ),
+        ("SELECT * FROM accounts WHERE user_id = 1", "ix_accounts_user_id"),
+        ("SELECT * FROM categories WHERE user_id = 1", "ix_categories_user_id"),
+        ("SELECT * FROM goals WHERE user_id = 1", "ix_goals_user_id"),
+        ("SELECT id FROM goals WHERE account_id = 1", "ix_goals_account_id"),
+        ("SELECT * FROM reminders WHERE user_id = 1", "ix_reminders_user_id"),
+        (
+            "SELECT id FROM transactions WHERE title ILIKE '%salary%'",
+            "ix_transactions_title_trgm",
+        ),
+        ("SELECT * FROM accounts WHERE name ILIKE '%check%'", "ix_accounts_name_trgm"),
+        (
+            "SELECT * FROM categories WHERE name ILIKE '%food%'",
+            "ix_categories_name_trgm",
+        ),
+    ],
+)
+def test_query_uses_index(client, db_session, query, index):
+    db_session.execute(text("SET enable_seqscan = off"))
+    plan = db_session.execute(text(f"EXPLAIN {query}")).scalars().all()
+    assert any(index in line for line in plan), "\n".join(plan)
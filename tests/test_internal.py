@@ -0,0 +1,18 @@
+import pytest
+
+
+ROUTES = ["/internal/hashing", "/internal/user-cache", "/internal/pool", "/internal/replicas"]
+
+
+@pytest.mark.parametrize("path", ROUTES)
+def test_internal_off_by_default(logged_client, path):
+    res = logged_client.get(path)
+    assert res.status_code == 404
+
+
+@pytest.mark.parametrize("path", ROUTES)
+def test_internal_refuses_anonymous(client, internal_headers, path):
+    assert client.get(path).status_code == 403
+    res = client.get(path, headers={"X-Internal-Token": "wrong"})
+    assert res.status_code == 403
+    assert client.get(path, headers=internal_headers).status_code == 200
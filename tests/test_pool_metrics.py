@@ -0,0 +1,95 @@
+import threading
+import time
+import pytest
+from sqlalchemy import create_engine, exc
+from app import database
+from app.config import settings
+from app.pool_metrics import InstrumentedQueuePool, pool_status
+from .conftest import DB_URL
+
+
+@pytest.fixture
+def small_engine():
+    engine = create_engine(
+        DB_URL,
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.2,
+    )
+    yield engine
+    engine.dispose()
+
+
+def test_counts_checkouts_and_timeouts(small_engine):
+    with small_engine.connect():
+        status = pool_status(small_engine.pool)
+        assert status["checked_out"] == 1
+        with pytest.raises(exc.TimeoutError):
+            small_engine.connect()
+
+    status = pool_status(small_engine.pool)
+    assert status["pool"] == "InstrumentedQueuePool"
+    assert status["size"] == 1
+    assert status["checked_out"] == 0
+    assert status["checkouts"] == 1
+    assert status["timeouts"] == 1
+    assert status["waiters"] == 0
+    assert sum(status["wait_histogram"].values()) == 1
+
+
+def test_measures_checkout_wait(small_engine):
+    held = threading.Event()
+
+    def hold():
+        with small_engine.connect():
+            held.set()
+            time.sleep(0.1)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    held.wait()
+    with small_engine.connect():
+        pass
+    thread.join()
+
+    status = pool_status(small_engine.pool)
+    assert status["checkouts"] == 2
+    assert status["peak_waiters"] == 1
+    assert status["max_wait_ms"] >= 50
+    assert status["wait_histogram"]["le_100ms"] + status["wait_histogram"]["le_250ms"] == 1
+
+
+def test_metrics_survive_dispose(small_engine):
+    with small_engine.connect():
+        pass
+    small_engine.dispose()
+    assert pool_status(small_engine.pool)["checkouts"] == 1
+
+
+def test_statement_timeout_args(monkeypatch):
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 0)
+    assert database._statement_timeout_args() == {}
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 5000)
+    assert database._statement_timeout_args() == {
+        "options": "-c statement_timeout=5000"
+    }
+    assert database._statement_timeout_args(asyncpg=True) == {
+        "server_settings": {"statement_timeout": "5000"}
+    }
+
+
+def test_connect_timeout_args():
+    assert database._connect_timeout_args(0) == {}
+    assert database._connect_timeout_args(1.5) == {"connect_timeout": 2}
+    assert database._connect_timeout_args(1.5, asyncpg=True) == {"timeout": 1.5}
+
+
+def test_pool_metrics_endpoint(client, internal_headers):
+    res = client.get("/internal/pool", headers=internal_headers)
+    assert res.status_code == 200
+    data = res.json()
+    assert data["sync"]["size"] == settings.DB_POOL_SIZE
+    assert data["sync"]["max_overflow"] == settings.DB_MAX_OVERFLOW
+    assert "wait_histogram" in data["sync"]
+    assert data["async"]["pool"] == "InstrumentedAsyncQueuePool"
@@ -0,0 +1,102 @@
+import logging
+from datetime import date, timedelta
+import pytest
+from sqlalchemy import text
+from app.config import settings
+from app.models import Reminder
+from app.query_stats import track_queries
+from .conftest import engine, query_count
+
+# Statements each read endpoint may run once the current user is cached
+QUERY_BUDGETS = {
+    "/accounts/": 1,
+    "/categories/": 1,
+    "/goals/": 2,
+    "/reminders/": 2,
+    "/transactions/": 2,
+    "/transactions/filter": 1,
+    "/transactions/page": 1,
+    "/transactions/summary": 1,
+    "/transactions/monthly": 1,
+    "/sync/transactions": 2,  # transactions, then account-delete tombstones
+    "/forecast/": 2,
+}
+
+
+@pytest.fixture
+def warm_client(logged_client, test_transactions, test_goals, test_reminders):
+    # Loads the current user into the user cache
+    assert logged_client.get("/accounts/").status_code == 200
+    return logged_client
+
+
+def test_server_timing_header(warm_client):
+    res = warm_client.get("/accounts/")
+    assert res.status_code == 200
+    assert res.headers["server-timing"].startswith("db;dur=")
+    assert query_count(res) == 1
+
+
+@pytest.mark.parametrize("url", QUERY_BUDGETS)
+def test_query_budget(warm_client, url):
+    res = warm_client.get(url)
+    assert res.status_code == 200
+    assert query_count(res) <= QUERY_BUDGETS[url]
+
+
+def test_reminder_queries_do_not_grow_with_rows(warm_client, test_user, db_session):
+    before = query_count(warm_client.get("/reminders/"))
+    db_session.add_all(
+        Reminder(
+            user_id=test_user["id"],
+            title=f"Reminder {i}",
+            amount=10.0 * i,
+            date=date.today() + timedelta(days=i),
+        )
+        for i in range(1, 6)
+    )
+    db_session.commit()
+
+    res = warm_client.get("/reminders/")
+    assert len(res.json()) == 8
+    assert query_count(res) == before
+
+
+def test_track_queries_counts_repeats():
+    with track_queries(track_statements=True) as queries:
+        with engine.connect() as conn:
+            for _ in range(3):
+                conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+    assert queries.count == 4
+    assert queries.seconds > 0
+    assert queries.repeated(threshold=3) == [("SELECT 1", 3)]
+
+
+def test_queries_outside_requests_are_not_counted():
+    with track_queries() as queries:
+        pass
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert queries.count == 0
+
+
+def test_debug_logs_repeated_statements(warm_client, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "QUERY_DEBUG", True)
+    monkeypatch.setattr(settings, "QUERY_REPEAT_THRESHOLD", 1)
+    with caplog.at_level(logging.WARNING, logger="app.query_stats"):
+        warm_client.get("/accounts/")
+    assert any("GET /accounts/" in record.message for record in caplog.records)
+
+
+def test_debug_is_quiet_below_threshold(warm_client, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "QUERY_DEBUG", True)
+    with caplog.at_level(logging.WARNING, logger="app.query_stats"):
+        warm_client.get("/goals/")
+    assert caplog.records == []
+
+
+def test_server_timing_can_be_disabled(warm_client, monkeypatch):
+    monkeypatch.setattr(settings, "SERVER_TIMING", False)
+    res = warm_client.get("/accounts/")
+    assert "server-timing" not in res.headers
@@ -0,0 +1,69 @@
+from app.hashing import hasher
+from app.rate_limit import MemoryBackend, Rule, limiter
+import pytest
+
+
+def test_parse_rule():
+    assert Rule.parse("10/minute") == Rule(capacity=10, period=60)
+    for value in ["10", "0/minute", "ten/minute", "10/week"]:
+        with pytest.raises(ValueError):
+            Rule.parse(value)
+
+
+def test_bucket_refill():
+    backend = MemoryBackend()
+    rule = Rule(capacity=2, period=10)
+    assert backend.take("key", rule, now=0) == 0
+    assert backend.take("key", rule, now=0) == 0
+    assert backend.take("key", rule, now=0) == pytest.approx(5)
+    assert backend.take("other", rule, now=0) == 0
+    # One token back after period / capacity seconds
+    assert backend.take("key", rule, now=5) == 0
+    assert backend.take("key", rule, now=5) > 0
+
+
+def test_sweep_idle_buckets():
+    backend = MemoryBackend(max_keys=2)
+    rule = Rule(capacity=1, period=10)
+    backend.take("a", rule, now=0)
+    backend.take("b", rule, now=0)
+    backend.take("c", rule, now=20)
+    assert backend.take("a", rule, now=20) == 0
+
+
+def test_login_rate_limited(client, test_user):
+    data = {"username": test_user["login"], "password": "wrong_password"}
+    for _ in range(10):
+        assert client.post("/login", data=data).status_code == 401
+
+    submitted = hasher.metrics()["submitted"]
+    res = client.post("/login", data=data)
+    assert res.status_code == 429
+    assert int(res.headers["Retry-After"]) >= 1
+    # Rejected before any password work
+    assert hasher.metrics()["submitted"] == submitted
+
+    # The client's IP bucket is empty too, so other logins are refused as well
+    res = client.post("/login", data={"username": "someone", "password": "x"})
+    assert res.status_code == 429
+
+
+def test_create_user_rate_limited(client):
+    statuses = [
+        client.post(
+            "/users/",
+            json={"username": "u", "login": f"login{i}", "password": "password123"},
+        ).status_code
+        for i in range(6)
+    ]
+    assert statuses == [201] * 5 + [429]
+
+
+def test_rate_limit_disabled(client, test_user, monkeypatch):
+    monkeypatch.setattr(limiter, "enabled", False)
+    for i in range(6):
+        res = client.post(
+            "/users/",
+            json={"username": "u", "login": f"login{i}", "password": "password123"},
+        )
+        assert res.status_code == 201
@@ -0,0 +1,149 @@
+import asyncio
+import socket
+import time
+import pytest
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from app import replicas
+from app.config import settings
+from app.replicas import ReplicaSet, recent_writes
+from .conftest import DB_URL
+
+DEAD_URL = make_url(DB_URL).set(port=1)
+
+
+def null_pool_engines(url):
+    # TestClient runs each request on a fresh event loop (see conftest)
+    url = make_url(url)
+    return (
+        create_engine(url.set(drivername="postgresql+psycopg2"), poolclass=NullPool),
+        create_async_engine(url.set(drivername="postgresql+asyncpg"), poolclass=NullPool),
+    )
+
+
+def replica_set(urls, check_interval=60.0):
+    return ReplicaSet(urls, check_interval, engine_factory=null_pool_engines)
+
+
+@pytest.fixture
+def clear_recent_writes():
+    recent_writes.clear()
+    yield
+    recent_writes.clear()
+
+
+@pytest.fixture
+def replicated(client, monkeypatch):
+    replicas_ = replica_set([DB_URL])
+    monkeypatch.setattr(replicas, "replica_set", replicas_)
+    return replicas_
+
+
+def test_silent_replica_probe_times_out(monkeypatch):
+    monkeypatch.setattr(settings, "DB_REPLICA_CONNECT_TIMEOUT_SECONDS", 1.0)
+    # Accepts TCP connections but never answers, like a blackholed host
+    with socket.socket() as silent:
+        silent.bind(("127.0.0.1", 0))
+        silent.listen(16)
+        url = make_url(DB_URL).set(host="127.0.0.1", port=silent.getsockname()[1])
+        replica = replicas.Replica(url, replicas.create_replica_engines(url))
+        try:
+            started = time.monotonic()
+            replica.check()
+            assert replica.healthy is False
+            replica.healthy = True
+            asyncio.run(replica.check_async())
+            assert replica.healthy is False
+            assert time.monotonic() - started < 5
+        finally:
+            replica.engine.dispose()
+
+
+def test_no_replicas_reads_from_primary():
+    assert replica_set([]).choose(1) is None
+
+
+def test_round_robin(clear_recent_writes):
+    replicas_ = replica_set([DB_URL, DB_URL])
+    first, second = replicas_.replicas
+    assert [replicas_.choose(1) for _ in range(4)] == [first, second, first, second]
+    assert first.reads == second.reads == 2
+
+
+def test_skips_unhealthy_replica(clear_recent_writes):
+    replicas_ = replica_set([DEAD_URL, DB_URL])
+    dead, alive = replicas_.replicas
+    assert [replicas_.choose(1) for _ in range(3)] == [alive, alive, alive]
+    assert dead.healthy is False
+    assert alive.healthy is True
+
+
+def test_all_unhealthy_falls_back_to_primary(clear_recent_writes):
+    replicas_ = replica_set([DEAD_URL])
+    assert replicas_.choose(1) is None
+    assert replicas_.metrics()["primary_reads"] == 1
+
+
+def test_health_is_rechecked(clear_recent_writes):
+    replicas_ = replica_set([DB_URL], check_interval=0.0)
+    replica = replicas_.replicas[0]
+    replica.healthy = False
+    assert replicas_.choose(1) is replica
+
+
+def test_recent_writer_reads_from_primary(clear_recent_writes):
+    replicas_ = replica_set([DB_URL])
+    recent_writes.record(1)
+    assert replicas_.choose(1) is None
+    assert replicas_.choose(2) is replicas_.replicas[0]
+    assert replicas_.metrics()["sticky_reads"] == 1
+
+
+def test_get_routes_read_from_replica(replicated, logged_client, test_accounts):
+    res = logged_client.get("/accounts/")
+    assert res.status_code == 200
+    assert len(res.json()) == 2
+    res = logged_client.get("/categories/")
+    assert res.status_code == 200
+    assert replicated.replicas[0].reads == 2
+
+
+def test_reads_stick_to_primary_after_write(replicated, logged_client):
+    res = logged_client.post("/accounts/", json={"name": "New", "balance": 10})
+    assert res.status_code == 201
+
+    res = logged_client.get(f"/accounts/{res.json()['id']}")
+    assert res.status_code == 200
+    assert replicated.replicas[0].reads == 0
+    assert replicated.metrics()["sticky_reads"] == 1
+
+
+def test_failed_write_does_not_stick(replicated, logged_client):
+    res = logged_client.post("/accounts/", json={})
+    assert res.status_code == 422
+    assert replicated.metrics()["recent_writers"] == 0
+
+
+def test_read_only_post_reads_from_replica(
+    replicated, logged_client, test_transactions
+):
+    ids = [t.id for t in test_transactions]
+    res = logged_client.post("/transactions/batch/fetch", json={"ids": ids})
+    assert res.status_code == 200
+    assert replicated.replicas[0].reads == 1
+    assert replicated.metrics()["recent_writers"] == 0
+
+    # ...and does not pin the next read to the primary
+    assert logged_client.get("/accounts/").status_code == 200
+    assert replicated.replicas[0].reads == 2
+
+
+def test_replica_metrics_endpoint(replicated, logged_client, internal_headers):
+    logged_client.get("/accounts/")
+    res = logged_client.get("/internal/replicas", headers=internal_headers)
+    assert res.status_code == 200
+    data = res.json()
+    assert data["replicas"][0]["healthy"] is True
+    assert data["replicas"][0]["reads"] == 1
+    assert "***" in data["replicas"][0]["url"]
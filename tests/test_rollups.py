@@ -0,0 +1,148 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app import models, rollups, schemas
+from .conftest import engine
+
+
+def create(client, **data):
+    res = client.post("/transactions/", json=data)
+    assert res.status_code == 201
+    return res.json()["id"]
+
+
+def test_rollups_follow_transaction_writes(
+    logged_client, test_categories, test_accounts, db_session
+):
+    checking, savings = test_accounts[0].id, test_accounts[1].id
+    food, income = test_categories[1].id, test_categories[0].id
+
+    groceries = create(
+        logged_client,
+        title="Groceries",
+        amount=80.0,
+        category_id=food,
+        from_account_id=checking,
+        done_at="2024-03-10T10:00:00+00:00",
+    )
+    transfer = create(
+        logged_client,
+        title="To savings",
+        amount=200.0,
+        category_id=income,
+        from_account_id=checking,
+        to_account_id=savings,
+        done_at="2024-03-11T10:00:00+00:00",
+    )
+    res = logged_client.post(
+        "/transactions/batch",
+        json=[
+            {
+                "title": "Lunch",
+                "amount": 20.0,
+                "category_id": food,
+                "from_account_id": checking,
+                "done_at": "2024-03-12T10:00:00+00:00",
+            }
+        ],
+    )
+    assert res.status_code == 200
+
+    res = logged_client.put(f"/transactions/{groceries}", json={"amount": 100.0})
+    assert res.status_code == 200
+    res = logged_client.put(f"/transactions/{transfer}", json={"category_id": food})
+    assert res.status_code == 200
+    res = logged_client.put(f"/transactions/{transfer}", json={"title": "Renamed"})
+    assert res.status_code == 200
+    res = logged_client.delete(f"/transactions/{groceries}")
+    assert res.status_code == 204
+
+    db_session.expire_all()
+    assert rollups.verify(db_session) == []
+
+    res = logged_client.get("/transactions/monthly?from_month=2024-03-15")
+    assert res.status_code == 200
+    rows = {
+        (row.category_id, row.account_id): row
+        for row in (schemas.MonthlyRollup(**row) for row in res.json())
+    }
+    assert set(rows) == {(food, checking), (food, savings)}
+    assert rows[(food, checking)].month == date(2024, 3, 1)
+    assert rows[(food, checking)].outflow == 220.0
+    assert rows[(food, checking)].count == 2
+    assert rows[(food, savings)].inflow == 200.0
+
+
+def test_rollups_follow_account_delete(
+    logged_client, test_transactions, test_accounts, db_session
+):
+    # Fixture rows bypass the routes; the salary transfer also touches account 2
+    rollups.rebuild(db_session)
+    db_session.commit()
+
+    res = logged_client.delete(f"/accounts/{test_accounts[0].id}")
+    assert res.status_code == 204
+
+    db_session.expire_all()
+    assert rollups.verify(db_session) == []
+
+
+def test_account_delete_waits_for_concurrent_add(
+    logged_client, test_user, test_categories, test_accounts, db_session
+):
+    checking, savings = test_accounts[0].id, test_accounts[1].id
+    with engine.connect() as conn:
+        # An add of a transfer out of checking, past the change counter but
+        # not committed yet
+        conn.execute(
+            pg_insert(models.ChangeCounter)
+            .values(user_id=test_user["id"], change_seq=1)
+            .on_conflict_do_nothing()
+        )
+        trans_id = conn.scalar(
+            insert(models.Transaction)
+            .values(
+                title="Transfer",
+                amount=50.0,
+                user_id=test_user["id"],
+                category_id=test_categories[0].id,
+                from_account_id=checking,
+                to_account_id=savings,
+                change_seq=1,
+            )
+            .returning(models.Transaction.id)
+        )
+        conn.execute(rollups.apply_transactions_statement([trans_id], 1))
+
+        with ThreadPoolExecutor(1) as pool:
+            deleting = pool.submit(logged_client.delete, f"/accounts/{checking}")
+            time.sleep(0.5)
+            assert not deleting.done()
+            conn.commit()
+            assert deleting.result(timeout=10).status_code == 204
+
+    # The transfer's leg in savings was taken out of the rollups too
+    db_session.expire_all()
+    assert rollups.verify(db_session) == []
+
+
+def test_rollups_rebuild_and_verify(test_users, test_transactions, db_session):
+    # Fixture rows are inserted directly, bypassing the rollups
+    mismatches = rollups.verify(db_session)
+    assert len(mismatches) > 0
+    assert all(have is None for _, have, _ in mismatches)
+
+    rollups.rebuild(db_session, test_users[0]["id"])
+    db_session.commit()
+    assert rollups.verify(db_session, test_users[0]["id"]) == []
+    assert rollups.verify(db_session, test_users[1]["id"]) != []
+
+    db_session.query(models.MonthlyRollup).update({"outflow": 1.0})
+    db_session.commit()
+    assert rollups.verify(db_session, test_users[0]["id"]) != []
+
+    rollups.rebuild(db_session)
+    db_session.commit()
+    assert rollups.verify(db_session) == []
@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import text, update
+from app import models, schemas
+from .conftest import engine
+
+
+def sync_all(client, cursor=None, limit=2):
+    items, deleted = [], []
+    while True:
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        res = client.get("/sync/transactions", params=params)
+        assert res.status_code == 200
+        page = schemas.TransactionSyncResponse(**res.json())
+        items.extend(page.items)
+        deleted.extend(page.deleted)
+        cursor = page.next_cursor
+        if not page.has_more:
+            return items, deleted, cursor
+
+
+def test_sync_transactions_initial(test_user, logged_client, test_transactions):
+    items, deleted, cursor = sync_all(logged_client, limit=1)
+    user_transactions = [t for t in test_transactions if t.user_id == test_user["id"]]
+    assert sorted(t.id for t in items) == sorted(t.id for t in user_transactions)
+    assert deleted == []
+    assert cursor is not None
+
+
+def test_sync_transactions_empty(logged_client, test_user):
+    res = logged_client.get("/sync/transactions")
+    assert res.status_code == 200
+    page = schemas.TransactionSyncResponse(**res.json())
+    assert page.items == []
+    assert page.next_cursor is None
+    assert page.has_more is False
+
+
+def test_sync_transactions_incremental(logged_client, test_transactions):
+    _, _, cursor = sync_all(logged_client)
+
+    # Nothing changed: same cursor comes back
+    items, deleted, same_cursor = sync_all(logged_client, cursor)
+    assert items == [] and deleted == []
+    assert same_cursor == cursor
+
+    res = logged_client.put(
+        f"/transactions/{test_transactions[0].id}", json={"title": "Renamed"}
+    )
+    assert res.status_code == 200
+    res = logged_client.delete(f"/transactions/{test_transactions[1].id}")
+    assert res.status_code == 204
+
+    items, deleted, _ = sync_all(logged_client, cursor)
+    assert [t.id for t in items] == [test_transactions[0].id]
+    assert items[0].title == "Renamed"
+    assert deleted == [test_transactions[1].id]
+
+
+def test_sync_transactions_late_commit(logged_client, test_transactions, db_session):
+    _, _, cursor = sync_all(logged_client)
+
+    res = logged_client.post(
+        "/transactions/",
+        json={
+            "title": "Imported",
+            "amount": 10.0,
+            "category_id": test_transactions[0].category_id,
+            "from_account_id": test_transactions[0].from_account_id,
+        },
+    )
+    assert res.status_code == 201
+    # As if it came from a long transaction that started before the last sync
+    db_session.query(models.Transaction).filter_by(id=res.json()["id"]).update(
+        {"updated_at": datetime.now(timezone.utc) - timedelta(days=1)}
+    )
+    db_session.commit()
+
+    items, _, _ = sync_all(logged_client, cursor)
+    assert [t.id for t in items] == [res.json()["id"]]
+
+
+def test_sync_transactions_account_delete(
+    test_user, logged_client, test_transactions, test_accounts
+):
+    _, _, cursor = sync_all(logged_client)
+    savings = test_accounts[1].id
+    removed = [
+        t.id
+        for t in test_transactions
+        if savings in (t.from_account_id, t.to_account_id)
+    ]
+    assert len(removed) == 2
+
+    res = logged_client.delete(f"/accounts/{savings}")
+    assert res.status_code == 204
+    # The cascade leaves no rows behind, only tombstones
+    items, deleted, cursor = sync_all(logged_client, cursor, limit=1)
+    assert items == []
+    assert sorted(deleted) == sorted(removed)
+
+    # Later changes still come after the tombstones
+    res = logged_client.post(
+        "/transactions/",
+        json={
+            "title": "After",
+            "amount": 1.0,
+            "category_id": test_transactions[0].category_id,
+            "from_account_id": test_accounts[0].id,
+        },
+    )
+    assert res.status_code == 201
+    items, deleted, _ = sync_all(logged_client, cursor)
+    assert [t.id for t in items] == [res.json()["id"]]
+    assert deleted == []
+
+
+def test_change_counter_leaves_user_row_free(test_user, db_session):
+    # A write in progress, e.g. a long import, holds the user's change counter...
+    db_session.add(models.ChangeCounter(user_id=test_user["id"], change_seq=1))
+    db_session.flush()
+
+    # ...while /login, /refresh and /logout still update the users row
+    with engine.connect() as conn:
+        conn.execute(text("SET lock_timeout = '1s'"))
+        conn.execute(
+            update(models.User)
+            .where(models.User.id == test_user["id"])
+            .values(token_version=models.User.token_version + 1)
+        )
+        conn.rollback()
+    db_session.rollback()
+
+
+def test_sync_transactions_invalid_cursor(logged_client):
+    res = logged_client.get("/sync/transactions?cursor=e30")
+    assert res.status_code == 400
+    assert res.json().get("detail") == "Invalid cursor"
+
+
+def test_sync_transactions_unauthorized(client):
+    res = client.get("/sync/transactions")
+    assert res.status_code == 401
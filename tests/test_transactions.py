@@ -1,4 +1,6 @@
+import pytest
 from app import models, schemas
+from app.routers.transactions import encode_cursor
 from datetime import datetime, timezone, timedelta
 from urllib.parse import quote
 
@@ -509,3 +511,468 @@ def test_get_updated_transactions_since(
     payload = res.json()
     assert test_transactions[0].id in payload
     assert other_transaction.id not in payload
+
+
+def test_create_transaction_updates_balances(
+    logged_client, test_categories, test_accounts, db_session
+):
+    transaction_data = {
+        "title": "Transfer",
+        "amount": 250.0,
+        "category_id": test_categories[0].id,
+        "from_account_id": test_accounts[0].id,
+        "to_account_id": test_accounts[1].id,
+    }
+    res = logged_client.post("/transactions/", json=transaction_data)
+    assert res.status_code == 201
+    assert res.json()["done_at"] is not None
+
+    db_session.expire_all()
+    from_account = db_session.get(models.Account, test_accounts[0].id)
+    to_account = db_session.get(models.Account, test_accounts[1].id)
+    assert from_account.balance == 1000.0 - 250.0
+    assert to_account.balance == 5000.0 + 250.0
+
+
+def test_update_transaction_amount_applies_difference(
+    logged_client, test_categories, test_accounts, db_session
+):
+    transaction_data = {
+        "title": "Groceries",
+        "amount": 100.0,
+        "category_id": test_categories[1].id,
+        "from_account_id": test_accounts[0].id,
+    }
+    res = logged_client.post("/transactions/", json=transaction_data)
+    assert res.status_code == 201
+
+    res = logged_client.put(
+        f"/transactions/{res.json()['id']}", json={"amount": 150.0}
+    )
+    assert res.status_code == 200
+    assert res.json()["amount"] == 150.0
+
+    db_session.expire_all()
+    account = db_session.get(models.Account, test_accounts[0].id)
+    assert account.balance == 1000.0 - 150.0
+
+
+def test_delete_transaction_reverts_balances_once(
+    logged_client, test_categories, test_accounts, db_session
+):
+    transaction_data = {
+        "title": "Transfer",
+        "amount": 300.0,
+        "category_id": test_categories[0].id,
+        "from_account_id": test_accounts[0].id,
+        "to_account_id": test_accounts[1].id,
+    }
+    res = logged_client.post("/transactions/", json=transaction_data)
+    assert res.status_code == 201
+    trans_id = res.json()["id"]
+
+    res = logged_client.delete(f"/transactions/{trans_id}")
+    assert res.status_code == 204
+    res = logged_client.delete(f"/transactions/{trans_id}")
+    assert res.status_code == 404
+
+    db_session.expire_all()
+    assert db_session.get(models.Account, test_accounts[0].id).balance == 1000.0
+    assert db_session.get(models.Account, test_accounts[1].id).balance == 5000.0
+
+
+def test_create_transactions_batch(
+    test_users, logged_client, test_categories, test_accounts, db_session
+):
+    other_user_account = next(
+        acc for acc in test_accounts if acc.user_id != test_users[0]["id"]
+    )
+    batch = [
+        {
+            "title": "Coffee",
+            "amount": 5.0,
+            "category_id": test_categories[1].id,
+            "from_account_id": test_accounts[0].id,
+        },
+        {
+            "title": "Missing category",
+            "amount": 10.0,
+            "category_id": 999999,
+            "from_account_id": test_accounts[0].id,
+        },
+        {
+            "title": "Forbidden account",
+            "amount": 10.0,
+            "category_id": test_categories[1].id,
+            "from_account_id": other_user_account.id,
+        },
+        {
+            "title": "No account",
+            "amount": 10.0,
+            "category_id": test_categories[1].id,
+        },
+        {
+            "title": "Transfer",
+            "amount": 100.0,
+            "category_id": test_categories[3].id,
+            "from_account_id": test_accounts[0].id,
+            "to_account_id": test_accounts[1].id,
+            "done_at": "2024-01-15T10:00:00+00:00",
+        },
+    ]
+    res = logged_client.post("/transactions/batch", json=batch)
+    assert res.status_code == 200
+    result = schemas.TransactionBatchResponse(**res.json())
+
+    assert [item.index for item in result.created] == [0, 4]
+    errors = {error.index: error for error in result.errors}
+    assert errors[1].status_code == 404
+    assert errors[1].detail == "Category was not found"
+    assert errors[2].status_code == 403
+    assert errors[3].status_code == 422
+
+    db_session.expire_all()
+    created = db_session.get(models.Transaction, result.created[1].id)
+    assert created.title == "Transfer"
+    assert created.user_id == test_users[0]["id"]
+    assert created.done_at.year == 2024
+    assert db_session.get(models.Account, test_accounts[0].id).balance == 895.0
+    assert db_session.get(models.Account, test_accounts[1].id).balance == 5100.0
+
+
+@pytest.mark.parametrize("amount", ["NaN", "Infinity", "-Infinity"])
+def test_create_transactions_batch_non_finite(
+    amount, logged_client, test_categories, test_accounts, db_session
+):
+    # Python's json module reads these tokens; raw bodies bypass the client's
+    # own JSON encoder, which refuses them
+    body = (
+        '[{"title": "Coffee", "amount": 5.0, "category_id": %d, "from_account_id": %d},'
+        ' {"title": "Bad", "amount": %s, "category_id": %d, "from_account_id": %d}]'
+        % (
+            test_categories[1].id,
+            test_accounts[0].id,
+            amount,
+            test_categories[1].id,
+            test_accounts[0].id,
+        )
+    )
+    headers = {"Content-Type": "application/json"}
+    res = logged_client.post("/transactions/batch", content=body, headers=headers)
+    assert res.status_code == 422
+    assert res.json()["detail"][0]["loc"] == ["body", 1, "amount"]
+
+    res = logged_client.put(
+        "/transactions/1", content='{"amount": %s}' % amount, headers=headers
+    )
+    assert res.status_code == 422
+
+    db_session.expire_all()
+    assert db_session.get(models.Account, test_accounts[0].id).balance == 1000.0
+    assert db_session.query(models.Transaction).count() == 0
+
+
+def test_create_transactions_batch_too_large(logged_client, monkeypatch):
+    from app.routers import transactions
+
+    monkeypatch.setattr(transactions, "MAX_BATCH_SIZE", 1)
+    item = {"title": "t", "amount": 1.0, "category_id": 1, "from_account_id": 1}
+    res = logged_client.post("/transactions/batch", json=[item, item])
+    assert res.status_code == 413
+
+
+def test_import_transactions_csv(
+    logged_client, test_categories, test_accounts, db_session
+):
+    statement = (
+        "Date,Description,Amount\n"
+        "2024-01-02,Salary,1500.00\n"
+        "2024-01-03,Groceries,-200.50\n"
+        "2024-01-04,Broken,not-a-number\n"
+        "2024-01-05,,-10\n"
+        "2024-01-06,Not a number,nan\n"
+        "2024-01-07,Infinite,-inf\n"
+    )
+    res = logged_client.post(
+        f"/transactions/import?account_id={test_accounts[0].id}"
+        f"&category_id={test_categories[0].id}",
+        files={"file": ("statement.csv", statement, "text/csv")},
+    )
+    assert res.status_code == 200
+    summary = schemas.TransactionImportSummary(**res.json())
+    assert summary.imported == 2
+    assert summary.rejected == 4
+    assert [reject.line for reject in summary.rejects] == [4, 5, 6, 7]
+    assert summary.rejects[2].detail == "Amount must be a finite number"
+
+    db_session.expire_all()
+    imported = (
+        db_session.query(models.Transaction)
+        .filter(models.Transaction.title == "Groceries")
+        .one()
+    )
+    assert imported.from_account_id == test_accounts[0].id
+    assert imported.amount == 200.5
+    assert imported.done_at.day == 3
+    account = db_session.get(models.Account, test_accounts[0].id)
+    assert account.balance == 1000.0 + 1500.0 - 200.5
+
+
+def test_import_transactions_ofx(
+    logged_client, test_categories, test_accounts, db_session
+):
+    statement = """OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20240110120000.000[-5:EST]
+<TRNAMT>-42.10
+<NAME>Bookshop
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20240111
+<TRNAMT>100
+<MEMO>Refund
+</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+    res = logged_client.post(
+        f"/transactions/import?account_id={test_accounts[1].id}"
+        f"&category_id={test_categories[1].id}",
+        files={"file": ("statement.ofx", statement, "application/x-ofx")},
+    )
+    assert res.status_code == 200
+    summary = schemas.TransactionImportSummary(**res.json())
+    assert summary.imported == 2
+    assert summary.rejected == 0
+
+    db_session.expire_all()
+    account = db_session.get(models.Account, test_accounts[1].id)
+    assert account.balance == 5000.0 - 42.1 + 100
+
+
+def test_import_transactions_forbidden_account(
+    test_users, logged_client, test_categories, test_accounts
+):
+    other_user_account = next(
+        acc for acc in test_accounts if acc.user_id != test_users[0]["id"]
+    )
+    res = logged_client.post(
+        f"/transactions/import?account_id={other_user_account.id}"
+        f"&category_id={test_categories[0].id}",
+        files={"file": ("statement.csv", "Date,Title,Amount\n", "text/csv")},
+    )
+    assert res.status_code == 403
+
+
+def test_import_transactions_unsupported_format(logged_client, test_accounts):
+    res = logged_client.post(
+        f"/transactions/import?account_id={test_accounts[0].id}&format=xls",
+        files={"file": ("statement.xls", "", "application/vnd.ms-excel")},
+    )
+    assert res.status_code == 422
+
+
+def test_export_transactions_csv(test_user, logged_client, test_transactions):
+    res = logged_client.get("/transactions/export")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/csv")
+
+    lines = res.text.strip().splitlines()
+    assert lines[0] == "id,title,amount,category_id,from_account_id,to_account_id,done_at"
+    user_transactions = [
+        trans for trans in test_transactions if trans.user_id == test_user["id"]
+    ]
+    assert len(lines) - 1 == len(user_transactions)
+
+
+def test_export_transactions_ndjson_with_filter(
+    logged_client, test_transactions
+):
+    import json
+
+    res = logged_client.get("/transactions/export?format=ndjson&search=Salary")
+    assert res.status_code == 200
+    records = [json.loads(line) for line in res.text.splitlines()]
+    assert len(records) == 1
+    assert records[0]["title"] == "Salary"
+    assert records[0]["id"] == test_transactions[0].id
+    schemas.Transaction(**records[0])
+
+
+def test_export_transactions_forbidden_category(
+    test_users, logged_client, test_categories
+):
+    other_user_category = next(
+        cat for cat in test_categories if cat.user_id not in (None, test_users[0]["id"])
+    )
+    res = logged_client.get(f"/transactions/export?category_id={other_user_category.id}")
+    assert res.status_code == 403
+
+
+@pytest.mark.parametrize("sort_by", ["id", "title", "amount", "done_at"])
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+def test_get_transactions_page_walks_all_rows(
+    logged_client, test_categories, test_accounts, sort_by, sort_order
+):
+    batch = [
+        {
+            "title": f"Item {i % 3}",
+            "amount": float(i % 4),
+            "category_id": test_categories[0].id,
+            "from_account_id": test_accounts[0].id,
+            "done_at": f"2024-01-{1 + i % 5:02d}T00:00:00+00:00",
+        }
+        for i in range(11)
+    ]
+    res = logged_client.post("/transactions/batch", json=batch)
+    assert res.status_code == 200
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 3, "sort_by": sort_by, "sort_order": sort_order}
+        if cursor:
+            params["cursor"] = cursor
+        res = logged_client.get("/transactions/page", params=params)
+        assert res.status_code == 200
+        page = schemas.TransactionCursorResponse(**res.json())
+        assert page.pagination.total is None
+        seen.extend(page.items)
+        if not page.pagination.has_next:
+            assert page.pagination.next_cursor is None
+            break
+        cursor = page.pagination.next_cursor
+
+    assert len({t.id for t in seen}) == len(batch)
+    keys = [(getattr(t, sort_by), t.id) for t in seen]
+    assert keys == sorted(keys, reverse=sort_order == "desc")
+
+
+def test_get_transactions_page_total_excludes_deleted(
+    logged_client, test_user, test_transactions
+):
+    res = logged_client.delete(f"/transactions/{test_transactions[0].id}")
+    assert res.status_code == 204
+
+    res = logged_client.get("/transactions/page?include_total=true")
+    assert res.status_code == 200
+    user_transactions = [
+        trans for trans in test_transactions if trans.user_id == test_user["id"]
+    ]
+    assert res.json()["pagination"]["total"] == len(user_transactions) - 1
+
+    res = logged_client.get("/transactions/")
+    assert res.json()["pagination"]["total"] == len(user_transactions) - 1
+
+
+def test_get_transactions_page_invalid_cursor(logged_client, test_transactions):
+    res = logged_client.get("/transactions/page?cursor=not-a-cursor")
+    assert res.status_code == 400
+    assert res.json().get("detail") == "Invalid cursor"
+
+    # A well-formed cursor whose value does not fit the sort column
+    for sort_by, value in [("amount", "abc"), ("id", "abc"), ("title", 5)]:
+        cursor = encode_cursor({"sort": [sort_by, "desc"], "value": value, "id": 1})
+        res = logged_client.get(
+            "/transactions/page",
+            params={"cursor": cursor, "sort_by": sort_by, "sort_order": "desc"},
+        )
+        assert res.status_code == 400
+        assert res.json().get("detail") == "Invalid cursor"
+
+
+def test_get_transactions_search_case_insensitive(
+    logged_client, test_transactions
+):
+    res = logged_client.get("/transactions/filter?search=sAlArY")
+    assert res.status_code == 200
+    assert res.json() == [test_transactions[0].id]
+
+    # LIKE wildcards in the search text are matched literally
+    res = logged_client.get("/transactions/filter?search=%25")
+    assert res.status_code == 200
+    assert res.json() == []
+
+
+def test_get_transactions_batch(test_user, logged_client, test_transactions):
+    other = next(t for t in test_transactions if t.user_id != test_user["id"])
+    own = [t.id for t in test_transactions if t.user_id == test_user["id"]]
+    res = logged_client.delete(f"/transactions/{own[1]}")
+    assert res.status_code == 204
+
+    ids = [own[0], own[1], other.id, 999999]
+    res = logged_client.get("/transactions/batch", params={"ids": ids})
+    assert res.status_code == 200
+    assert [t["id"] for t in res.json()] == [own[0]]
+
+    res = logged_client.post("/transactions/batch/fetch", json={"ids": ids})
+    assert res.status_code == 200
+    assert [schemas.Transaction(**t).id for t in res.json()] == [own[0]]
+
+
+def test_get_transactions_batch_too_many_ids(logged_client, monkeypatch):
+    from app.routers import transactions
+
+    monkeypatch.setattr(transactions, "MAX_FETCH_IDS", 2)
+    res = logged_client.post("/transactions/batch/fetch", json={"ids": [1, 2, 3]})
+    assert res.status_code == 413
+
+
+def test_get_transactions_summary(
+    logged_client, test_categories, test_accounts
+):
+    def item(title, amount, category, done_at, from_account=None, to_account=None):
+        return {
+            "title": title,
+            "amount": amount,
+            "category_id": test_categories[category].id,
+            "from_account_id": from_account and test_accounts[from_account - 1].id,
+            "to_account_id": to_account and test_accounts[to_account - 1].id,
+            "done_at": done_at,
+        }
+
+    batch = [
+        item("Salary", 1000.0, 0, "2024-01-05T12:00:00+00:00", to_account=1),
+        item("Food", 40.0, 1, "2024-01-10T12:00:00+00:00", from_account=1),
+        item("Food", 60.0, 1, "2024-01-20T12:00:00+00:00", from_account=1),
+        item("Savings", 300.0, 0, "2024-01-25T12:00:00+00:00", 1, 2),
+        item("Food", 25.0, 1, "2024-02-03T12:00:00+00:00", from_account=1),
+    ]
+    res = logged_client.post("/transactions/batch", json=batch)
+    assert res.status_code == 200
+
+    res = logged_client.get(
+        "/transactions/summary?bucket=month&from_date=2024-01-01T00:00:00Z"
+    )
+    assert res.status_code == 200
+    rows = [schemas.TransactionSummary(**row) for row in res.json()]
+    totals = {
+        (row.period.month, row.category_id): (
+            row.income,
+            row.expense,
+            row.transfer,
+            row.count,
+        )
+        for row in rows
+    }
+    assert totals == {
+        (1, test_categories[0].id): (1000.0, 0.0, 300.0, 2),
+        (1, test_categories[1].id): (0.0, 100.0, 0.0, 2),
+        (2, test_categories[1].id): (0.0, 25.0, 0.0, 1),
+    }
+
+    res = logged_client.get(
+        "/transactions/summary?bucket=year&from_date=2024-01-01T00:00:00Z"
+        f"&category_id={test_categories[1].id}"
+    )
+    assert res.status_code == 200
+    rows = res.json()
+    assert len(rows) == 1
+    assert rows[0]["expense"] == 125.0
+
+
+def test_get_transactions_summary_invalid_bucket(logged_client):
+    res = logged_client.get("/transactions/summary?bucket=hour")
+    assert res.status_code == 422
@@ -0,0 +1,82 @@
+from datetime import datetime, timezone
+from unittest import mock
+from app import schemas
+from app.user_cache import CurrentUser, UserCache, user_cache
+
+
+def snapshot(id):
+    return CurrentUser(
+        id=id,
+        username=f"user{id}",
+        login=f"login{id}",
+        token_version=0,
+        created_at=datetime.now(timezone.utc),
+    )
+
+
+def test_lru_eviction():
+    cache = UserCache(size=2, ttl=60)
+    cache.put(0, snapshot(1))
+    cache.put(0, snapshot(2))
+    assert cache.get(1, 0) is not None  # 1 is now most recently used
+    cache.put(0, snapshot(3))
+
+    assert cache.get(2, 0) is None
+    assert cache.get(1, 0) is not None
+    assert cache.get(3, 0) is not None
+    assert cache.metrics()["evictions"] == 1
+
+
+def test_ttl_expiry():
+    cache = UserCache(size=10, ttl=5)
+    with mock.patch("app.user_cache.time.monotonic", return_value=100.0):
+        cache.put(0, snapshot(1))
+    with mock.patch("app.user_cache.time.monotonic", return_value=104.0):
+        assert cache.get(1, 0) is not None
+    with mock.patch("app.user_cache.time.monotonic", return_value=106.0):
+        assert cache.get(1, 0) is None
+    assert cache.metrics()["size"] == 0
+
+
+def test_keyed_on_token_version():
+    cache = UserCache(size=10, ttl=60)
+    cache.put(0, snapshot(1))
+    assert cache.get(1, 1) is None
+    cache.put(1, snapshot(1))
+    cache.invalidate(1)
+    assert cache.get(1, 0) is None
+    assert cache.get(1, 1) is None
+    assert cache.metrics()["invalidations"] == 2
+
+
+def test_repeated_requests_hit_cache(logged_client, test_user):
+    before = user_cache.metrics()
+    for _ in range(3):
+        res = logged_client.get("/users/me")
+        assert res.status_code == 200
+    after = user_cache.metrics()
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 2
+
+
+def test_update_user_invalidates(logged_client, test_user):
+    assert logged_client.get("/users/me").json()["username"] == test_user["username"]
+
+    res = logged_client.put("/users/", json={"username": "renamed"})
+    assert res.status_code == 200
+
+    me = schemas.User(**logged_client.get("/users/me").json())
+    assert me.username == "renamed"
+
+
+def test_delete_user_invalidates(logged_client, test_user):
+    assert logged_client.get("/users/me").status_code == 200
+    assert logged_client.delete("/users/").status_code == 204
+    assert logged_client.get("/users/me").status_code == 401
+
+
+def test_user_cache_metrics_endpoint(logged_client, test_user, internal_headers):
+    logged_client.get("/users/me")
+    res = logged_client.get("/internal/user-cache", headers=internal_headers)
+    assert res.status_code == 200
+    assert res.json()["size"] == 1